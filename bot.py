@@ -2,8 +2,25 @@ import discord
 from discord.ext import commands
 import asyncio
 import os
+import time
+import traceback
 from utils.data_manager import DataManager
 from utils.scheduler import MatchScheduler
+from utils.value_history import ValueHistory
+from utils.charts import ChartRenderer
+from utils.guild_settings import GuildSettings
+from utils.dm_pipeline import DMPipeline
+from utils.fixtures import FixtureIndex
+from utils.metrics import registry, process_rss_bytes
+from utils.loop_monitor import LoopLagMonitor
+from utils.command_tree import TrackedCommandTree
+from utils.command_runner import CommandRunner
+from utils.perf import CommandProfiler
+from utils.command_sync import CommandSync
+from utils.startup import startup
+from utils.role_members import RoleMemberResolver
+from utils.sharding import sharding_options
+from web_server import WebServer
 
 class DiscordBot:
     def __init__(self):
@@ -11,18 +28,44 @@ class DiscordBot:
         intents = discord.Intents.default()
         intents.message_content = True
         intents.guilds = True
-        intents.members = True
+        intents.members = True  # needed to list members, even when they are not cached
         
-        # Create bot instance
-        self.bot = commands.Bot(
-            command_prefix='!',  # Slash commands primarily, but keeping prefix for compatibility
-            intents=intents,
-            help_command=None
-        )
+        # MEMBER_CACHE decides how many members discord.py keeps in memory
+        self.role_members = RoleMemberResolver()
+        
+        # Create bot instance; SHARDING=auto opts into one gateway connection per shard
+        sharding = sharding_options()
+        with startup.phase('init discord client'):
+            self.bot = sharding['cls'](
+                command_prefix='!',  # Slash commands primarily, but keeping prefix for compatibility
+                intents=intents,
+                help_command=None,
+                tree_cls=TrackedCommandTree,
+                member_cache_flags=self.role_members.cache_flags(),
+                chunk_guilds_at_startup=self.role_members.chunk_at_startup,
+                **sharding['kwargs']
+            )
         
-        # Initialize data manager and scheduler
-        self.data_manager = DataManager()
-        self.scheduler = MatchScheduler(self.bot, self.data_manager)
+        # Initialize data manager and scheduler; none of these read data files yet
+        with startup.phase('init data layer'):
+            self.data_manager = DataManager()
+            self.command_runner = CommandRunner()
+            self.value_history = ValueHistory(self.data_manager, self.command_runner)
+            self.guild_settings = GuildSettings(self.data_manager)
+            self.fixture_index = FixtureIndex(self.data_manager)
+        with startup.phase('init services'):
+            self.charts = ChartRenderer()
+            self.dm_pipeline = DMPipeline()
+            self.profiler = CommandProfiler()
+            self.command_sync = CommandSync(self.bot, self.data_manager)
+            self.sync_task = None
+            self.warm_task = None
+            self.bot.setup_hook = self.setup_hook
+            self.scheduler = MatchScheduler(self.bot, self.data_manager, self.guild_settings)
+            self.loop_monitor = LoopLagMonitor(context=self.bot.tree.describe_in_flight)
+        with startup.phase('init web server'):
+            self.web_server = WebServer(self)
+            self.setup_metrics()
         
         # Setup events
         self.setup_events()
@@ -34,18 +77,75 @@ class DiscordBot:
         """Setup bot events"""
         @self.bot.event
         async def on_ready():
+            # Fires again after every gateway reconnect, so keep this cheap and idempotent
+            started = time.monotonic()
             print(f'{self.bot.user} has connected to Discord!')
             print(f'Bot is in {len(self.bot.guilds)} guilds')
             
-            # Sync slash commands
-            try:
-                synced = await self.bot.tree.sync()
-                print(f'Synced {len(synced)} command(s)')
-            except Exception as e:
-                print(f'Failed to sync commands: {e}')
+            if startup.milestone('gateway ready'):
+                print(f"Ready {startup.elapsed('gateway ready'):.2f}s after startup")
+                if startup.verbose:
+                    print(startup.report())
+                # Load data files off the loop now that we are connected; the scheduler starts once they are read
+                self.warm_task = asyncio.create_task(self.warm_data())
+            elif self.warm_task.done():
+                # Restarts the match scheduler if its loop died (a no-op while it is running)
+                await self.scheduler.start()
             
-            # Start the match scheduler
-            await self.scheduler.start()
+            print(f'Ready handling took {time.monotonic() - started:.3f}s')
+        
+        # With AutoShardedBot, on_ready waits for every shard, so the scheduler never
+        # sends catch-up reminders while some guilds are still missing
+        @self.bot.event
+        async def on_shard_ready(shard_id):
+            print(f'Shard {shard_id} ready')
+        
+        # Keep the cached announcement channels in sync with the guild
+        @self.bot.event
+        async def on_guild_channel_create(channel):
+            self.guild_settings.invalidate_channel(channel)
+        
+        @self.bot.event
+        async def on_guild_channel_delete(channel):
+            self.guild_settings.invalidate_channel(channel)
+        
+        @self.bot.event
+        async def on_guild_channel_update(before, after):
+            if before.overwrites != after.overwrites or before.category_id != after.category_id:
+                self.guild_settings.invalidate_channel(after)
+        
+        @self.bot.event
+        async def on_guild_role_update(before, after):
+            if before.permissions != after.permissions:
+                self.guild_settings.invalidate(after.guild.id)
+        
+        @self.bot.event
+        async def on_guild_role_delete(role):
+            self.role_members.invalidate(role.id)
+        
+        # Only fires for members discord.py has cached; others expire with MEMBER_CACHE_TTL
+        @self.bot.event
+        async def on_member_update(before, after):
+            if before.roles != after.roles:
+                for role_id in {role.id for role in before.roles} ^ {role.id for role in after.roles}:
+                    self.role_members.invalidate(role_id)
+                if after.id == self.bot.user.id:
+                    self.guild_settings.invalidate(after.guild.id)
+        
+        @self.bot.event
+        async def on_guild_remove(guild):
+            self.guild_settings.invalidate(guild.id)
+        
+        @self.bot.event
+        async def on_app_command_completion(interaction, command):
+            self.record_command(interaction, command.qualified_name, 'ok')
+        
+        @self.bot.tree.error
+        async def on_app_command_error(interaction, error):
+            name = interaction.command.qualified_name if interaction.command else 'unknown'
+            self.record_command(interaction, name, 'error')
+            print(f"Error in /{name}: {error}")
+            traceback.print_exception(type(error), error, error.__traceback__)
         
         @self.bot.event
         async def on_command_error(ctx, error):
@@ -56,21 +156,88 @@ class DiscordBot:
             else:
                 print(f"Command error: {error}")
     
+    async def setup_hook(self):
+        """Runs once per process after login, before the gateway connects"""
+        startup.milestone('logged in')
+        # Sync in the background so a slow or rate-limited sync never delays readiness
+        self.sync_task = asyncio.create_task(self.command_sync.sync())
+    
+    async def warm_data(self):
+        """Read the data files and build the API snapshots on a worker thread, then start the scheduler"""
+        started = time.monotonic()
+        upcoming = None
+        try:
+            upcoming = await self.command_runner.run_blocking(self.load_data_caches)
+            print(f"Warmed data caches in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            print(f"Failed to warm data caches: {e}")
+        # Without a warmed index the scheduler reads it itself
+        await self.scheduler.start(upcoming)
+    
+    def load_data_caches(self):
+        """Returns the upcoming matches index for the scheduler"""
+        self.data_manager.prepare()
+        self.guild_settings.load()
+        self.value_history.fold()
+        self.web_server.api.league_summary()
+        return self.data_manager.load_upcoming_matches()
+    
+    def setup_metrics(self):
+        """Register command metrics and the gauges read at scrape time"""
+        self.command_invocations = registry.counter(
+            'football_bot_commands_total', 'Slash command invocations by outcome', ('command', 'status')
+        )
+        registry.gauge('football_bot_gateway_latency_seconds', 'Discord gateway heartbeat latency',
+                       lambda: self.bot.latency if self.bot.is_ready() else None)
+        registry.gauge('football_bot_guilds', 'Guilds the bot is in', lambda: len(self.bot.guilds))
+        registry.gauge('process_resident_memory_bytes', 'Resident memory size in bytes', process_rss_bytes)
+        registry.summary('football_bot_reminder_lag_seconds', 'Delay between a reminder being due and delivered',
+                         self.scheduler.reminder_lag)
+        registry.summary('football_bot_scheduler_batch_seconds', 'Time spent handling one batch of due timers',
+                         self.scheduler.loop_duration)
+        registry.gauge('football_bot_scheduler_pending_timers', 'Match timers waiting to fire',
+                       lambda: len(self.scheduler.timer_keys))
+    
+    def record_command(self, interaction, name: str, status: str):
+        self.bot.tree.finish(interaction)
+        if startup.milestone('first interaction handled'):
+            print(f"First interaction handled {startup.elapsed('first interaction handled'):.2f}s after startup")
+            if startup.verbose:
+                print(startup.report())
+        self.command_invocations.inc(name, status)
+    
     def load_commands(self):
         """Load all command modules"""
-        from commands.club_commands import ClubCommands
-        from commands.player_commands import PlayerCommands
-        from commands.match_commands import MatchCommands
-        from commands.stats_commands import StatsCommands
-        from commands.admin_commands import AdminCommands
-        
-        # Add command classes to bot
-        ClubCommands(self.bot, self.data_manager)
-        PlayerCommands(self.bot, self.data_manager)
-        MatchCommands(self.bot, self.data_manager, self.scheduler)
-        StatsCommands(self.bot, self.data_manager)
-        AdminCommands(self.bot, self.data_manager)
+        # Each module is imported and registered in its own phase so --profile-startup can attribute the cost
+        with startup.phase('commands: clubs'):
+            from commands.club_commands import ClubCommands
+            ClubCommands(self.bot, self.data_manager, self.value_history, self.scheduler, self.fixture_index,
+                         self.command_runner, self.role_members, self.profiler)
+        with startup.phase('commands: players'):
+            from commands.player_commands import PlayerCommands
+            PlayerCommands(self.bot, self.data_manager, self.value_history, self.command_runner, self.profiler)
+        with startup.phase('commands: matches'):
+            from commands.match_commands import MatchCommands
+            MatchCommands(self.bot, self.data_manager, self.scheduler, self.dm_pipeline, self.fixture_index,
+                          self.role_members, self.command_runner, self.profiler)
+        with startup.phase('commands: stats'):
+            from commands.stats_commands import StatsCommands
+            StatsCommands(self.bot, self.data_manager, self.charts, self.command_runner, self.profiler)
+        with startup.phase('commands: admin'):
+            from commands.admin_commands import AdminCommands
+            AdminCommands(self.bot, self.data_manager, self.guild_settings, self.value_history, self.scheduler,
+                          self.command_runner, self.profiler)
     
     async def run(self, token):
         """Run the bot"""
-        await self.bot.start(token)
+        # The keep-alive server shares the bot's event loop
+        self.loop_monitor.start()
+        with startup.phase('start web server'):
+            await self.web_server.start()
+        try:
+            await self.bot.start(token)
+        finally:
+            await self.web_server.stop()
+            self.loop_monitor.stop()
+            self.charts.shutdown()
+            self.command_runner.shutdown()
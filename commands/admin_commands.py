@@ -1,20 +1,29 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import io
 import json
+import math
 import os
 from typing import Optional
+from utils.sharding import shard_summary
 
 class AdminCommands:
-    def __init__(self, bot, data_manager):
+    def __init__(self, bot, data_manager, guild_settings, value_history, scheduler, runner, profiler):
         self.bot = bot
         self.data = data_manager
+        self.guild_settings = guild_settings
+        self.value_history = value_history
+        self.scheduler = scheduler
+        self.runner = runner
+        self.profiler = profiler
         self.setup_commands()
     
     def setup_commands(self):
         """Setup all admin-related slash commands"""
         
         @self.bot.tree.command(name="reset_all", description="Reset all data (clubs, players, matches, transfers)")
+        @self.profiler.timed
         async def reset_all(interaction: discord.Interaction):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -29,44 +38,20 @@ class AdminCommands:
             embed.add_field(name="❌ This action cannot be undone!", value="Type 'CONFIRM RESET' to proceed", inline=False)
             
             # Create a view with buttons for confirmation
-            view = ResetConfirmationView(self.data)
+            view = ResetConfirmationView(self.data, self.value_history, self.runner)
             await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
         
         @self.bot.tree.command(name="backup_data", description="Create a backup of all data")
+        @self.profiler.timed
+        @self.runner.heavy(admin_only=True)
         async def backup_data(interaction: discord.Interaction):
-            if not interaction.user.guild_permissions.administrator:
-                await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
-                return
-            
             try:
-                # Load all data
-                clubs = self.data.load_clubs()
-                players = self.data.load_players()
-                matches = self.data.load_matches()
-                transfers = self.data.load_transfers()
-                
-                # Create backup data structure
-                backup_data = {
-                    'clubs': clubs,
-                    'players': players,
-                    'matches': matches,
-                    'transfers': transfers,
-                    'backup_info': {
-                        'created_by': interaction.user.id,
-                        'created_at': discord.utils.utcnow().isoformat(),
-                        'total_clubs': len(clubs),
-                        'total_players': len(players),
-                        'total_matches': len(matches),
-                        'total_transfers': len(transfers)
-                    }
-                }
-                
-                # Convert to JSON string
-                backup_json = json.dumps(backup_data, indent=2)
+                # Load and serialize everything off the event loop
+                backup_bytes, totals = await self.runner.run_blocking(self.build_backup, interaction.user.id)
                 
                 # Create file-like object
                 backup_file = discord.File(
-                    fp=discord.utils.BytesIO(backup_json.encode()),
+                    fp=io.BytesIO(backup_bytes),
                     filename=f"backup_{discord.utils.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
                 )
                 
@@ -75,18 +60,19 @@ class AdminCommands:
                     description="Complete backup of all bot data",
                     color=0x00ff00
                 )
-                embed.add_field(name="📊 Clubs", value=str(len(clubs)), inline=True)
-                embed.add_field(name="⚽ Players", value=str(len(players)), inline=True)
-                embed.add_field(name="🏟️ Matches", value=str(len(matches)), inline=True)
-                embed.add_field(name="🔄 Transfers", value=str(len(transfers)), inline=True)
+                embed.add_field(name="📊 Clubs", value=str(totals['total_clubs']), inline=True)
+                embed.add_field(name="⚽ Players", value=str(totals['total_players']), inline=True)
+                embed.add_field(name="🏟️ Matches", value=str(totals['total_matches']), inline=True)
+                embed.add_field(name="🔄 Transfers", value=str(totals['total_transfers']), inline=True)
                 embed.set_footer(text=f"Backup created by {interaction.user.display_name}")
                 
-                await interaction.response.send_message(embed=embed, file=backup_file)
+                await interaction.followup.send(embed=embed, file=backup_file)
                 
             except Exception as e:
-                await interaction.response.send_message(f"❌ Error creating backup: {str(e)}", ephemeral=True)
+                await interaction.followup.send(f"❌ Error creating backup: {str(e)}", ephemeral=True)
         
         @self.bot.tree.command(name="system_info", description="Display bot system information")
+        @self.profiler.timed
         async def system_info(interaction: discord.Interaction):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -134,8 +120,104 @@ class AdminCommands:
                 inline=True
             )
             
+            if isinstance(self.bot, commands.AutoShardedBot):
+                shards = shard_summary(self.bot)
+                # Field values hold at most 1024 characters
+                lines = [
+                    f"{'🔴' if shard['closed'] else '🟢'} Shard {shard['shard_id']}: "
+                    f"{self.format_latency(shard['latency'])}, {shard['guilds']} guilds"
+                    for shard in shards[:20]
+                ]
+                if len(shards) > 20:
+                    lines.append(f"...and {len(shards) - 20} more shards")
+                embed.add_field(name=f"🧩 Shards ({len(shards)})", value="\n".join(lines), inline=False)
+            
             await interaction.response.send_message(embed=embed)
         
+        @self.bot.tree.command(name="scheduler_stats", description="Display match scheduler timing and delivery metrics")
+        @self.profiler.timed
+        async def scheduler_stats(interaction: discord.Interaction):
+            if not interaction.user.guild_permissions.administrator:
+                await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
+                return
+            
+            stats = self.scheduler.stats()
+            lag = stats['reminder_lag']
+            loop = stats['loop_duration']
+            delivery = stats['delivery']
+            
+            embed = discord.Embed(
+                title="⏱️ Scheduler Statistics",
+                description="🟢 Running" if stats['running'] else "🔴 Stopped",
+                color=0x0099ff
+            )
+            
+            next_due = f"in {stats['next_due_in']:.0f}s" if stats['next_due_in'] is not None else "Nothing scheduled"
+            embed.add_field(
+                name="📋 Queue",
+                value=f"⏳ Pending timers: {stats['pending_timers']}\n🗂️ Heap entries: {stats['heap_size']}\n⏭️ Next: {next_due}\n🔥 Fired: {stats['timers_fired']}",
+                inline=True
+            )
+            embed.add_field(
+                name="🐢 Reminder Lag",
+                value=f"Count: {lag['count']}\np50: {lag['p50']:.2f}s\np90: {lag['p90']:.2f}s\np99: {lag['p99']:.2f}s\nMax: {lag['max']:.2f}s",
+                inline=True
+            )
+            embed.add_field(
+                name="🔁 Batch Duration",
+                value=f"Count: {loop['count']}\np50: {loop['p50']:.2f}s\np90: {loop['p90']:.2f}s\nMax: {loop['max']:.2f}s",
+                inline=True
+            )
+            
+            failing = sorted(delivery['guilds'].items(), key=lambda item: item[1]['failed'], reverse=True)
+            failing = [f"• {guild_id}: {counts['failed']} failed / {counts['sent']} sent" for guild_id, counts in failing[:5] if counts['failed']]
+            embed.add_field(
+                name="📨 Deliveries",
+                value=f"✅ Sent: {delivery['sent']}\n❌ Failed: {delivery['failed']}" + ("\n" + "\n".join(failing) if failing else ""),
+                inline=False
+            )
+            
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        
+        @self.bot.tree.command(name="perf_report", description="Display per-command latency percentiles by phase")
+        @app_commands.describe(limit="Number of commands to show (1-24, default: 10)")
+        @self.profiler.timed
+        async def perf_report(interaction: discord.Interaction, limit: app_commands.Range[int, 1, 24] = 10):
+            if not interaction.user.guild_permissions.administrator:
+                await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
+                return
+            
+            rows = self.profiler.report()
+            if not rows:
+                await interaction.response.send_message("❌ No commands have been timed yet!", ephemeral=True)
+                return
+            
+            embed = discord.Embed(
+                title="⏱️ Command Performance",
+                description="Slowest commands by p90, split into data load, compute and Discord send time",
+                color=0x0099ff
+            )
+            
+            for row in rows[:limit]:
+                total = row['total']
+                embed.add_field(
+                    name=f"/{row['command']} ({total['count']} runs)",
+                    value=(
+                        f"⏱️ p50 {total['p50']:.2f}s | p90 {total['p90']:.2f}s | p99 {total['p99']:.2f}s\n"
+                        f"📂 Load p90: {row['load']['p90']:.2f}s\n"
+                        f"🧮 Compute p90: {row['compute']['p90']:.2f}s\n"
+                        f"📨 Send p90: {row['send']['p90']:.2f}s\n"
+                        f"📥 Queued p90: {row['queued']['p90']:.2f}s"
+                    ),
+                    inline=True
+                )
+            
+            if self.profiler.slow:
+                last = self.profiler.slow[-1]
+                embed.set_footer(text=f"{len(self.profiler.slow)} recent slow runs; last: /{last['command']} {last['total']:.2f}s")
+            
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        
         @self.bot.tree.command(name="embed_with_image", description="Create a custom embed with image upload")
         @app_commands.describe(
             title="Embed title",
@@ -143,6 +225,7 @@ class AdminCommands:
             color="Embed color (hex code without #, e.g., ff0000)",
             image="Upload an image from your album"
         )
+        @self.profiler.timed
         async def embed_with_image(interaction: discord.Interaction, title: str, description: str, color: Optional[str] = None, image: Optional[discord.Attachment] = None):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -184,6 +267,7 @@ class AdminCommands:
             club_id="ID of the club to rename",
             new_name="New name for the club"
         )
+        @self.profiler.timed
         async def rename_club(interaction: discord.Interaction, club_id: int, new_name: str):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -221,6 +305,7 @@ class AdminCommands:
             player_id="ID of the player to rename",
             new_name="New name for the player"
         )
+        @self.profiler.timed
         async def rename_player(interaction: discord.Interaction, player_id: int, new_name: str):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -258,6 +343,7 @@ class AdminCommands:
             player_id="ID of the player",
             new_age="New age for the player"
         )
+        @self.profiler.timed
         async def update_player_age(interaction: discord.Interaction, player_id: int, new_age: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -288,11 +374,73 @@ class AdminCommands:
             embed.add_field(name="Change", value=f"{new_age - old_age:+d} years", inline=True)
             
             await interaction.response.send_message(embed=embed)
+        
+        @self.bot.tree.command(name="set_announcement_channel", description="Set the channel used for match reminders")
+        @app_commands.describe(channel="Channel for match reminders (leave empty to use the first available channel)")
+        @self.profiler.timed
+        async def set_announcement_channel(interaction: discord.Interaction, channel: Optional[discord.TextChannel] = None):
+            if not interaction.user.guild_permissions.administrator:
+                await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
+                return
+            
+            if not interaction.guild:
+                await interaction.response.send_message("❌ This command can only be used in a server!", ephemeral=True)
+                return
+            
+            if channel and not channel.permissions_for(interaction.guild.me).send_messages:
+                await interaction.response.send_message(f"❌ I don't have permission to send messages in {channel.mention}!", ephemeral=True)
+                return
+            
+            self.guild_settings.set_announcement_channel(interaction.guild.id, channel.id if channel else None)
+            
+            embed = discord.Embed(
+                title="📢 Announcement Channel Updated",
+                description=f"Match reminders will be posted in {channel.mention}!" if channel else "Match reminders will be posted in the first channel I can write to.",
+                color=0x00ff00
+            )
+            embed.set_footer(text=f"Updated by {interaction.user.display_name}")
+            
+            await interaction.response.send_message(embed=embed)
+    
+    @staticmethod
+    def format_latency(latency: float) -> str:
+        """Heartbeat latency for display; a shard that is still connecting has none yet"""
+        return f"{round(latency * 1000)}ms" if math.isfinite(latency) else "n/a"
+    
+    def build_backup(self, user_id: int):
+        """Serialize all data for /backup_data; runs on a worker thread"""
+        _, loaded = self.data.load_consistent('clubs.json', 'players.json', 'matches.json', 'transfers.json')
+        clubs, players, matches, transfers = loaded.values()
+        
+        totals = {
+            'total_clubs': len(clubs),
+            'total_players': len(players),
+            'total_matches': len(matches),
+            'total_transfers': len(transfers)
+        }
+        
+        # Create backup data structure
+        backup_data = {
+            'clubs': clubs,
+            'players': players,
+            'matches': matches,
+            'transfers': transfers,
+            'backup_info': {
+                'created_by': user_id,
+                'created_at': discord.utils.utcnow().isoformat(),
+                **totals
+            }
+        }
+        
+        # Convert to JSON bytes
+        return json.dumps(backup_data, indent=2).encode(), totals
 
 class ResetConfirmationView(discord.ui.View):
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, value_history, runner):
         super().__init__(timeout=60)
         self.data = data_manager
+        self.value_history = value_history
+        self.runner = runner
     
     @discord.ui.button(label="CONFIRM RESET", style=discord.ButtonStyle.danger, emoji="💀")
     async def confirm_reset(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -307,10 +455,12 @@ class ResetConfirmationView(discord.ui.View):
             description="All data has been permanently deleted!",
             color=0xff0000
         )
-        embed.add_field(name="✅ Reset Complete", value="• All clubs deleted\n• All players deleted\n• All matches deleted\n• All transfers deleted", inline=False)
+        embed.add_field(name="✅ Reset Complete", value="• All clubs deleted\n• All players deleted\n• All matches deleted\n• All transfers deleted\n• Value history cleared", inline=False)
         embed.set_footer(text=f"Reset performed by {interaction.user.display_name}")
         
         await interaction.response.edit_message(embed=embed, view=None)
+        # Ids start over from 1, so no old series may survive
+        await self.runner.run_blocking(self.value_history.clear)
     
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary, emoji="❌")
     async def cancel_reset(self, interaction: discord.Interaction, button: discord.ui.Button):
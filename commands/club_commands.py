@@ -2,11 +2,18 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional
+from utils.events import match_summary
 
 class ClubCommands:
-    def __init__(self, bot, data_manager):
+    def __init__(self, bot, data_manager, value_history, scheduler, fixture_index, runner, role_members, profiler):
         self.bot = bot
         self.data = data_manager
+        self.value_history = value_history
+        self.scheduler = scheduler
+        self.fixtures = fixture_index
+        self.runner = runner
+        self.role_members = role_members
+        self.profiler = profiler
         self.setup_commands()
     
     def setup_commands(self):
@@ -18,6 +25,7 @@ class ClubCommands:
             budget="Initial budget in Euros",
             image="Upload club logo/image"
         )
+        @self.profiler.timed
         async def create_club(interaction: discord.Interaction, name: str, budget: int, image: Optional[discord.Attachment] = None):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -60,6 +68,7 @@ class ClubCommands:
             await interaction.response.send_message(embed=embed)
         
         @self.bot.tree.command(name="list_clubs", description="Display all football clubs")
+        @self.profiler.timed
         async def list_clubs(interaction: discord.Interaction):
             clubs = self.data.load_clubs()
             
@@ -90,6 +99,7 @@ class ClubCommands:
         
         @self.bot.tree.command(name="club_info", description="Get detailed information about a specific club")
         @app_commands.describe(club_id="ID of the club to view")
+        @self.profiler.timed
         async def club_info(interaction: discord.Interaction, club_id: int):
             clubs = self.data.load_clubs()
             players = self.data.load_players()
@@ -133,6 +143,7 @@ class ClubCommands:
             club_id="ID of the club",
             new_budget="New budget amount in Euros"
         )
+        @self.profiler.timed
         async def update_club_budget(interaction: discord.Interaction, club_id: int, new_budget: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -162,60 +173,50 @@ class ClubCommands:
         
         @self.bot.tree.command(name="delete_club", description="Delete a football club")
         @app_commands.describe(club_id="ID of the club to delete")
+        @self.profiler.timed
         async def delete_club(interaction: discord.Interaction, club_id: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
                 return
             
-            clubs = self.data.load_clubs()
-            players = self.data.load_players()
-            
-            club = next((c for c in clubs if c['id'] == club_id), None)
-            if not club:
+            # Same changes as /clear_club; nothing is awaited between planning and saving
+            plan = self.plan_club_deletion(club_id)
+            if not plan:
                 await interaction.response.send_message(f"❌ Club with ID {club_id} not found!", ephemeral=True)
                 return
             
-            # Remove club players
-            players = [p for p in players if p.get('club_id') != club_id]
-            self.data.save_players(players)
-            
-            # Remove club
-            clubs = [c for c in clubs if c['id'] != club_id]
-            self.data.save_clubs(clubs)
+            self.apply_club_deletion(plan)
+            club = plan['club']
             
             embed = discord.Embed(
                 title="🗑️ Club Deleted",
                 description=f"**{club['name']}** has been deleted successfully!",
                 color=0xff0000
             )
+            if plan['cancelled']:
+                embed.add_field(name="🏟️ Matches Cancelled", value=str(len(plan['cancelled'])), inline=True)
             
             await interaction.response.send_message(embed=embed)
+            await self.forget_history(plan)
         
         @self.bot.tree.command(name="clear_club", description="Delete a club completely")
         @app_commands.describe(club_id="ID of the club to delete")
+        @self.profiler.timed
+        @self.runner.heavy(admin_only=True)
         async def clear_club(interaction: discord.Interaction, club_id: int):
-            if not interaction.user.guild_permissions.administrator:
-                await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
+            plan, current = await self.runner.plan_current(self.data, self.CLEAR_FILES, self.plan_club_deletion, club_id)
+            if not current:
+                await interaction.followup.send("❌ Club data kept changing during the deletion. Please try again.", ephemeral=True)
                 return
             
-            clubs = self.data.load_clubs()
-            players = self.data.load_players()
-            
-            club = next((c for c in clubs if c['id'] == club_id), None)
-            if not club:
-                await interaction.response.send_message(f"❌ Club with ID {club_id} not found!", ephemeral=True)
+            if not plan:
+                await interaction.followup.send(f"❌ Club with ID {club_id} not found!", ephemeral=True)
                 return
             
-            # Find players in this club
-            club_players = [p for p in players if p.get('club_id') == club_id]
-            
-            # Remove club players completely
-            players = [p for p in players if p.get('club_id') != club_id]
-            self.data.save_players(players)
+            self.apply_club_deletion(plan)
+            club, club_players = plan['club'], plan['club_players']
             
-            # Remove club
-            clubs = [c for c in clubs if c['id'] != club_id]
-            self.data.save_clubs(clubs)
+            await self.forget_history(plan)
             
             embed = discord.Embed(
                 title="🗑️ Club Deleted",
@@ -224,7 +225,8 @@ class ClubCommands:
             )
             embed.add_field(name="🏆 Club", value=club['name'], inline=True)
             embed.add_field(name="👥 Players Deleted", value=str(len(club_players)), inline=True)
-            embed.add_field(name="📊 Status", value="Club and all players removed", inline=True)
+            embed.add_field(name="🏟️ Matches Cancelled", value=str(len(plan['cancelled'])), inline=True)
+            embed.add_field(name="📊 Status", value="Club and all players removed, upcoming matches cancelled", inline=True)
             
             if club_players:
                 if len(club_players) <= 10:
@@ -237,13 +239,14 @@ class ClubCommands:
             
             embed.set_footer(text=f"Club deleted by {interaction.user.display_name}")
             
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
         
         @self.bot.tree.command(name="set_club_role", description="Assign a Discord role to a club")
         @app_commands.describe(
             club_id="ID of the club",
             role="Discord role to assign to this club"
         )
+        @self.profiler.timed
         async def set_club_role(interaction: discord.Interaction, club_id: int, role: discord.Role):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -261,6 +264,16 @@ class ClubCommands:
             club['role_name'] = role.name
             self.data.save_clubs(clubs)
             
+            # Counting members may page through the member list; this also warms the cache for notifications
+            await interaction.response.defer()
+            self.role_members.invalidate(role.id)
+            try:
+                member_count = str(len(await self.role_members.members(role)))
+            except (discord.HTTPException, discord.ClientException) as e:
+                # The role is saved either way; only the count is missing
+                print(f"Could not count members of role {role.id}: {e}")
+                member_count = "Unknown"
+            
             embed = discord.Embed(
                 title="🏷️ Club Role Assigned",
                 description=f"**{club['name']}** has been linked to role **{role.name}**!",
@@ -268,14 +281,15 @@ class ClubCommands:
             )
             embed.add_field(name="🏆 Club", value=club['name'], inline=True)
             embed.add_field(name="🎭 Role", value=role.mention, inline=True)
-            embed.add_field(name="👥 Members", value=str(len(role.members)), inline=True)
+            embed.add_field(name="👥 Members", value=member_count, inline=True)
             
             embed.set_footer(text=f"Role assigned by {interaction.user.display_name}")
             
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
         
         @self.bot.tree.command(name="remove_club_role", description="Remove Discord role from a club")
         @app_commands.describe(club_id="ID of the club")
+        @self.profiler.timed
         async def remove_club_role(interaction: discord.Interaction, club_id: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -294,7 +308,7 @@ class ClubCommands:
             
             # Remove role data
             role_name = club.get('role_name', 'Unknown Role')
-            club.pop('role_id', None)
+            self.role_members.invalidate(club.pop('role_id'))
             club.pop('role_name', None)
             self.data.save_clubs(clubs)
             
@@ -311,6 +325,7 @@ class ClubCommands:
             await interaction.response.send_message(embed=embed)
         
         @self.bot.tree.command(name="club_roles", description="Display all clubs and their assigned roles")
+        @self.profiler.timed
         async def club_roles(interaction: discord.Interaction):
             clubs = self.data.load_clubs()
             
@@ -342,3 +357,63 @@ class ClubCommands:
             embed.set_footer(text=f"{clubs_with_roles}/{len(clubs)} clubs have assigned roles")
             
             await interaction.response.send_message(embed=embed)
+    
+    # Files /clear_club reads and rewrites
+    CLEAR_FILES = ('clubs.json', 'players.json', 'matches.json')
+    
+    def plan_club_deletion(self, club_id: int):
+        """Work out what deleting a club changes; /clear_club runs this on a worker thread.
+        
+        The club and its players are removed. Its scheduled and live matches are
+        cancelled rather than removed, so match history and ids stay intact.
+        Nothing is saved here: the caller saves on the event loop, checking that
+        none of the files changed since `version` if anything was awaited in
+        between. Returns None if the club does not exist.
+        """
+        version, loaded = self.data.load_consistent(*self.CLEAR_FILES)
+        clubs, players, matches = (loaded[f] for f in self.CLEAR_FILES)
+        
+        club = next((c for c in clubs if c['id'] == club_id), None)
+        if not club:
+            return None
+        
+        cancelled = []  # (old_status, match)
+        for match in matches:
+            if club_id in (match.get('club1_id'), match.get('club2_id')) and match.get('status') in self.data.UPCOMING_STATUSES:
+                cancelled.append((match['status'], match))
+                match['status'] = 'cancelled'
+        
+        return {
+            'version': version,
+            'club': club,
+            'club_players': [p for p in players if p.get('club_id') == club_id],
+            'clubs': [c for c in clubs if c['id'] != club_id],
+            'players': [p for p in players if p.get('club_id') != club_id],
+            'matches': matches,
+            'cancelled': cancelled
+        }
+    
+    async def forget_history(self, plan):
+        """Drop a deleted club's and its players' value history and record the new league total"""
+        # Deleted ids can be handed out again, so their history must not outlive them
+        keys = [self.value_history.club_key(plan['club']['id'])]
+        keys += [self.value_history.player_key(p['id']) for p in plan['club_players']]
+        await self.runner.run_blocking(self.value_history.remove_series, keys)
+        self.value_history.record_snapshot(plan['players'])
+    
+    def apply_club_deletion(self, plan):
+        """Save a planned club deletion and drop its cancelled matches from the timers and fixture index"""
+        index_synced = self.fixtures.version == self.data.get_version('matches.json')
+        self.data.save_players(plan['players'])
+        self.data.save_clubs(plan['clubs'])
+        if plan['cancelled']:
+            self.data.save_matches(plan['matches'])
+            for old_status, match in plan['cancelled']:
+                self.scheduler.cancel_match(match['id'])
+                if index_synced:
+                    self.fixtures.remove(match['id'])
+                self.data.publish('match.status_changed', old_status=old_status, **match_summary(match))
+            if index_synced:
+                self.fixtures.mark_synced()
+            else:
+                self.fixtures.invalidate()
@@ -3,12 +3,22 @@ from discord.ext import commands
 from discord import app_commands
 from datetime import datetime, timedelta
 import asyncio
+from utils.events import match_summary
+from utils.fixtures import FixtureIndex, round_robin, schedule_rounds
 
 class MatchCommands:
-    def __init__(self, bot, data_manager, scheduler):
+    # Files a generated season is planned from; the save is skipped if either changed meanwhile
+    SEASON_FILES = ('clubs.json', 'matches.json')
+    
+    def __init__(self, bot, data_manager, scheduler, dm_pipeline, fixture_index, role_members, runner, profiler):
         self.bot = bot
         self.data = data_manager
         self.scheduler = scheduler
+        self.dm_pipeline = dm_pipeline
+        self.fixtures = fixture_index
+        self.role_members = role_members
+        self.runner = runner
+        self.profiler = profiler
         self.setup_commands()
     
     def setup_commands(self):
@@ -24,6 +34,7 @@ class MatchCommands:
             hour="Hour of the match (0-23)",
             minute="Minute of the match (0-59)"
         )
+        @self.profiler.timed
         async def create_match(interaction: discord.Interaction, club1_id: int, club2_id: int, year: int, month: int, day: int, hour: int, minute: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -58,9 +69,16 @@ class MatchCommands:
                 await interaction.response.send_message("❌ Invalid date/time provided!", ephemeral=True)
                 return
             
+            # Make sure neither club is already playing at that time
+            conflict = self.fixtures.find_match_conflict(club1_id, club2_id, match_datetime)
+            if conflict:
+                busy_club = club1 if conflict[0] == club1_id else club2
+                await interaction.response.send_message(f"❌ **{busy_club['name']}** already has match {conflict[1]} at that time!", ephemeral=True)
+                return
+            
             # Create match
             match_data = {
-                'id': len(matches) + 1,
+                'id': self.data.get_next_id(matches),
                 'club1_id': club1_id,
                 'club2_id': club2_id,
                 'datetime': match_datetime.isoformat(),
@@ -72,9 +90,11 @@ class MatchCommands:
             
             matches.append(match_data)
             self.data.save_matches(matches)
+            self.fixtures.update(match_data)
+            self.data.publish('match.scheduled', **match_summary(match_data))
             
-            # Schedule reminder
-            await self.scheduler.schedule_match_reminder(match_data)
+            # Schedule reminder and kickoff timers
+            self.scheduler.schedule_match(match_data)
             
             # Create embed response
             embed = discord.Embed(
@@ -106,8 +126,13 @@ class MatchCommands:
         
         @self.bot.tree.command(name="list_matches", description="Display all scheduled matches")
         @app_commands.describe(status="Filter by match status (optional)")
+        @self.profiler.timed
         async def list_matches(interaction: discord.Interaction, status: str = None):
-            matches = self.data.load_matches()
+            # Upcoming statuses are served from the small upcoming index, not the full history
+            if status and status.lower() in self.data.UPCOMING_STATUSES:
+                matches = self.data.load_upcoming_matches()
+            else:
+                matches = self.data.load_matches()
             clubs = self.data.load_clubs()
             
             if status:
@@ -155,6 +180,7 @@ class MatchCommands:
         
         @self.bot.tree.command(name="match_info", description="Get detailed information about a specific match")
         @app_commands.describe(match_id="ID of the match to view")
+        @self.profiler.timed
         async def match_info(interaction: discord.Interaction, match_id: int):
             matches = self.data.load_matches()
             clubs = self.data.load_clubs()
@@ -203,6 +229,7 @@ class MatchCommands:
         
         @self.bot.tree.command(name="cancel_match", description="Cancel a scheduled match")
         @app_commands.describe(match_id="ID of the match to cancel")
+        @self.profiler.timed
         async def cancel_match(interaction: discord.Interaction, match_id: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -221,8 +248,12 @@ class MatchCommands:
                 return
             
             # Update match status
+            old_status = match.get('status', 'unknown')
             match['status'] = 'cancelled'
             self.data.save_matches(matches)
+            self.fixtures.update(match)
+            self.data.publish('match.status_changed', old_status=old_status, **match_summary(match))
+            self.scheduler.cancel_match(match_id)
             
             club1 = next((c for c in clubs if c['id'] == match['club1_id']), {'name': 'Unknown Club'})
             club2 = next((c for c in clubs if c['id'] == match['club2_id']), {'name': 'Unknown Club'})
@@ -242,6 +273,7 @@ class MatchCommands:
             match_id="ID of the match",
             new_status="New status (scheduled, live, finished, cancelled)"
         )
+        @self.profiler.timed
         async def update_match_status(interaction: discord.Interaction, match_id: int, new_status: str):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -263,6 +295,12 @@ class MatchCommands:
             old_status = match.get('status', 'unknown')
             match['status'] = new_status.lower()
             self.data.save_matches(matches)
+            self.fixtures.update(match)
+            if old_status != match['status']:
+                self.data.publish('match.status_changed', old_status=old_status, **match_summary(match))
+            
+            # Re-key the match timers for its new status
+            self.scheduler.schedule_match(match)
             
             club1 = next((c for c in clubs if c['id'] == match['club1_id']), {'name': 'Unknown Club'})
             club2 = next((c for c in clubs if c['id'] == match['club2_id']), {'name': 'Unknown Club'})
@@ -277,6 +315,233 @@ class MatchCommands:
             embed.add_field(name="New Status", value=new_status.title(), inline=True)
             
             await interaction.response.send_message(embed=embed)
+        
+        @self.bot.tree.command(name="generate_season", description="Generate a round-robin season for all clubs")
+        @app_commands.describe(
+            year="Year of the first matchday",
+            month="Month of the first matchday (1-12)",
+            day="Day of the first matchday",
+            hour="Kickoff hour of the first match each day (0-23)",
+            minute="Kickoff minute of the first match each day (0-59)",
+            spacing_minutes="Minutes between kickoffs on the same day (default: 120)",
+            matches_per_day="Maximum matches per day (default: 5)",
+            double_round_robin="Play every opponent home and away (default: True)"
+        )
+        @self.profiler.timed
+        @self.runner.heavy(admin_only=True)
+        async def generate_season(interaction: discord.Interaction, year: int, month: int, day: int, hour: int, minute: int, spacing_minutes: int = 120, matches_per_day: int = 5, double_round_robin: bool = True):
+            if spacing_minutes < 1 or matches_per_day < 1:
+                await interaction.followup.send("❌ Spacing and matches per day must be at least 1!", ephemeral=True)
+                return
+            
+            try:
+                start = datetime(year, month, day, hour, minute)
+                if start <= datetime.now():
+                    await interaction.followup.send("❌ Season start must be in the future!", ephemeral=True)
+                    return
+            except ValueError:
+                await interaction.followup.send("❌ Invalid date/time provided!", ephemeral=True)
+                return
+            
+            plan, current = await self.runner.plan_current(
+                self.data, self.SEASON_FILES, self.plan_season, start, timedelta(minutes=spacing_minutes),
+                matches_per_day, double_round_robin, interaction.user.id
+            )
+            if not current:
+                await interaction.followup.send("❌ Matches kept changing while the season was generated. Please try again.", ephemeral=True)
+                return
+            
+            if plan['error']:
+                await interaction.followup.send(plan['error'], ephemeral=True)
+                return
+            
+            clubs, rounds, fixtures, new_matches = plan['clubs'], plan['rounds'], plan['fixtures'], plan['new_matches']
+            
+            # Write every match in a single save
+            index_synced = self.fixtures.version == self.data.get_version('matches.json')
+            self.data.save_matches(plan['matches'] + new_matches)
+            if index_synced:
+                for match in new_matches:
+                    self.fixtures.insert(match)
+                self.fixtures.mark_synced()
+            else:
+                self.fixtures.invalidate()
+            for match in new_matches:
+                self.data.publish('match.scheduled', round=match['round'], **match_summary(match))
+            
+            # Register all reminder and kickoff timers in one batch
+            self.scheduler.schedule_matches(new_matches)
+            
+            first_kickoff = int(fixtures[0][3].timestamp())
+            last_kickoff = int(max(f[3] for f in fixtures).timestamp())
+            
+            embed = discord.Embed(
+                title="📅 Season Generated!",
+                description=f"{'Double' if double_round_robin else 'Single'} round-robin for {len(clubs)} clubs",
+                color=0x00ff00
+            )
+            embed.add_field(name="🔁 Rounds", value=str(len(rounds)), inline=True)
+            embed.add_field(name="⚽ Matches", value=str(len(new_matches)), inline=True)
+            embed.add_field(name="🆔 Match IDs", value=f"{new_matches[0]['id']}-{new_matches[-1]['id']}", inline=True)
+            embed.add_field(name="🏁 First Match", value=f"<t:{first_kickoff}:F>", inline=True)
+            embed.add_field(name="🏆 Last Match", value=f"<t:{last_kickoff}:F>", inline=True)
+            embed.add_field(name="⏱️ Schedule", value=f"Up to {matches_per_day} per day, {spacing_minutes} min apart", inline=True)
+            
+            embed.set_footer(text=f"Season generated by {interaction.user.display_name}")
+            
+            await interaction.followup.send(embed=embed)
+        
+        @self.bot.tree.command(name="reschedule_match", description="Move a scheduled match to a new date and time")
+        @app_commands.describe(
+            match_id="ID of the match",
+            year="New year of the match",
+            month="New month of the match (1-12)",
+            day="New day of the match",
+            hour="New hour of the match (0-23)",
+            minute="New minute of the match (0-59)"
+        )
+        @self.profiler.timed
+        async def reschedule_match(interaction: discord.Interaction, match_id: int, year: int, month: int, day: int, hour: int, minute: int):
+            if not interaction.user.guild_permissions.administrator:
+                await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
+                return
+            
+            try:
+                new_datetime = datetime(year, month, day, hour, minute)
+                if new_datetime <= datetime.now():
+                    await interaction.response.send_message("❌ Match date must be in the future!", ephemeral=True)
+                    return
+            except ValueError:
+                await interaction.response.send_message("❌ Invalid date/time provided!", ephemeral=True)
+                return
+            
+            matches = self.data.load_matches()
+            clubs = self.data.load_clubs()
+            
+            match = next((m for m in matches if m['id'] == match_id), None)
+            if not match:
+                await interaction.response.send_message(f"❌ Match with ID {match_id} not found!", ephemeral=True)
+                return
+            
+            if match.get('status') != 'scheduled':
+                await interaction.response.send_message(f"❌ Only scheduled matches can be rescheduled! (Status: {match.get('status', 'unknown').title()})", ephemeral=True)
+                return
+            
+            conflict = self.fixtures.find_match_conflict(match['club1_id'], match['club2_id'], new_datetime, exclude_match_id=match_id)
+            if conflict:
+                busy_club = next((c['name'] for c in clubs if c['id'] == conflict[0]), "Unknown Club")
+                await interaction.response.send_message(f"❌ **{busy_club}** already has match {conflict[1]} at that time!", ephemeral=True)
+                return
+            
+            old_datetime = datetime.fromisoformat(match['datetime'])
+            match['datetime'] = new_datetime.isoformat()
+            match['reminder_sent'] = False
+            self.data.save_matches(matches)
+            self.fixtures.update(match)
+            self.data.publish('match.scheduled', previous_datetime=old_datetime.isoformat(), **match_summary(match))
+            
+            # Re-key the match timers to the new kickoff
+            self.scheduler.schedule_match(match)
+            
+            club1 = next((c for c in clubs if c['id'] == match['club1_id']), {'name': 'Unknown Club'})
+            club2 = next((c for c in clubs if c['id'] == match['club2_id']), {'name': 'Unknown Club'})
+            
+            embed = discord.Embed(
+                title="📅 Match Rescheduled",
+                description=f"**{club1['name']}** vs **{club2['name']}**",
+                color=0x00ff00
+            )
+            embed.add_field(name="Match ID", value=match_id, inline=True)
+            embed.add_field(name="Old Time", value=f"<t:{int(old_datetime.timestamp())}:F>", inline=True)
+            embed.add_field(name="New Time", value=f"<t:{int(new_datetime.timestamp())}:F>", inline=True)
+            
+            await interaction.response.send_message(embed=embed)
+        
+        @self.bot.tree.command(name="fixture_conflicts", description="Find clubs that are double-booked in the calendar")
+        @self.profiler.timed
+        async def fixture_conflicts(interaction: discord.Interaction):
+            if not interaction.user.guild_permissions.administrator:
+                await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
+                return
+            
+            conflicts = self.fixtures.sweep_conflicts()
+            
+            if not conflicts:
+                embed = discord.Embed(
+                    title="✅ No Fixture Conflicts",
+                    description="No club has overlapping matches.",
+                    color=0x00ff00
+                )
+                await interaction.response.send_message(embed=embed)
+                return
+            
+            clubs = self.data.load_clubs()
+            club_names = {c['id']: c['name'] for c in clubs}
+            
+            embed = discord.Embed(
+                title="⚠️ Fixture Conflicts",
+                description=f"Found {len(conflicts)} overlapping match pairs",
+                color=0xff9900
+            )
+            
+            for club_id, match_id, other_id in conflicts[:20]:
+                embed.add_field(
+                    name=f"🏆 {club_names.get(club_id, f'Club {club_id}')}",
+                    value=f"Match {match_id} overlaps match {other_id}",
+                    inline=True
+                )
+            
+            if len(conflicts) > 20:
+                embed.set_footer(text=f"Showing 20 of {len(conflicts)} conflicts")
+            
+            await interaction.response.send_message(embed=embed)
+    
+    def plan_season(self, start: datetime, spacing: timedelta, matches_per_day: int, double: bool, created_by: int):
+        """Build a season's matches without saving them; runs on a worker thread.
+        
+        Conflicts are checked against a private fixture index so the shared one
+        is only touched on the event loop. The returned version lets the caller
+        detect saves that happened while planning.
+        """
+        plan = {'error': None, 'version': self.data.get_version(*self.SEASON_FILES)}
+        clubs = self.data.load_clubs()
+        if len(clubs) < 2:
+            plan['error'] = "❌ At least two clubs are needed to generate a season!"
+            return plan
+        
+        rounds = round_robin([c['id'] for c in clubs], double=double)
+        fixtures = schedule_rounds(rounds, start, spacing, matches_per_day)
+        
+        matches = self.data.load_matches()
+        index = FixtureIndex(self.data)
+        index.rebuild(matches)
+        next_id = self.data.get_next_id(matches)
+        new_matches = []
+        for round_number, club1_id, club2_id, kickoff in fixtures:
+            # Check against existing fixtures and the ones generated so far
+            conflict = index.find_match_conflict(club1_id, club2_id, kickoff)
+            if conflict:
+                busy_club = next((c['name'] for c in clubs if c['id'] == conflict[0]), "Unknown")
+                plan['error'] = (f"❌ Round {round_number} clashes with match {conflict[1]} for **{busy_club}** on "
+                                 f"<t:{int(kickoff.timestamp())}:F>. Increase the spacing or pick another start date.")
+                return plan
+            
+            new_matches.append({
+                'id': next_id,
+                'club1_id': club1_id,
+                'club2_id': club2_id,
+                'datetime': kickoff.isoformat(),
+                'status': 'scheduled',
+                'round': round_number,
+                'created_by': created_by,
+                'notified': False,
+                'reminder_sent': False
+            })
+            index.insert(new_matches[-1])
+            next_id += 1
+        
+        plan.update(clubs=clubs, rounds=rounds, fixtures=fixtures, matches=matches, new_matches=new_matches)
+        return plan
     
     async def send_match_notification(self, interaction, club1, club2, match_datetime, match_id):
         """Send private match notifications to club role members"""
@@ -297,43 +562,49 @@ class MatchCommands:
 🔥 Good luck to both teams!
             """.strip()
             
-            sent_to_members = 0
-            
-            # Send private messages to club1 role members
-            if club1.get('role_id'):
-                role1 = guild.get_role(club1['role_id'])
-                if role1 and role1.members:
-                    for member in role1.members:
-                        try:
-                            await member.send(f"🏆 **{club1['name']}** - Match Notification\n\n{match_message}")
-                            sent_to_members += 1
-                        except discord.Forbidden:
-                            # User has DMs disabled
-                            continue
-                        except Exception as e:
-                            print(f"Error sending DM to {member.display_name}: {e}")
-                            continue
-            
-            # Send private messages to club2 role members
-            if club2.get('role_id'):
-                role2 = guild.get_role(club2['role_id'])
-                if role2 and role2.members:
-                    for member in role2.members:
-                        try:
-                            await member.send(f"🏆 **{club2['name']}** - Match Notification\n\n{match_message}")
-                            sent_to_members += 1
-                        except discord.Forbidden:
-                            # User has DMs disabled
-                            continue
-                        except Exception as e:
-                            print(f"Error sending DM to {member.display_name}: {e}")
-                            continue
-            
-            # Send confirmation message to admin
-            if sent_to_members > 0:
-                await interaction.followup.send(f"✅ Match notifications sent to {sent_to_members} members via DM!", ephemeral=True)
-            else:
-                await interaction.followup.send("⚠️ No notifications sent (clubs without roles or members have DMs disabled)", ephemeral=True)
+            # Collect recipients once, even if they hold both club roles
+            clubs = [club for club in (club1, club2) if club.get('role_id') and guild.get_role(club['role_id'])]
+            holders = await self.role_members.resolve(guild, [club['role_id'] for club in clubs])
+            recipients = {}
+            for club in clubs:
+                for member in holders[club['role_id']]:
+                    if member.bot:
+                        continue
+                    recipients.setdefault(member.id, (member, []))[1].append(club['name'])
+            
+            if not recipients:
+                await interaction.followup.send("⚠️ No notifications sent (clubs without roles or roles without members)", ephemeral=True)
+                return
+            
+            messages = [
+                (member, f"🏆 **{' & '.join(club_names)}** - Match Notification\n\n{match_message}")
+                for member, club_names in recipients.values()
+            ]
+            
+            # Report progress by editing a single followup message
+            status_message = await interaction.followup.send(f"📨 Sending match notifications to {len(messages)} members...", ephemeral=True, wait=True)
+            last_edit = 0.0
+            
+            async def report_progress(summary):
+                nonlocal last_edit
+                now = asyncio.get_running_loop().time()
+                if now - last_edit < 2 or summary['done'] == summary['total']:
+                    return
+                last_edit = now
+                try:
+                    await status_message.edit(content=f"📨 Sending match notifications... {summary['done']}/{summary['total']}")
+                except discord.HTTPException:
+                    pass
+            
+            summary = await self.dm_pipeline.deliver(messages, progress=report_progress)
+            
+            result = f"✅ Match notifications sent to {summary['sent']}/{summary['total']} members via DM!"
+            not_sent = summary['closed'] + summary['skipped']
+            if not_sent:
+                result += f"\n⚠️ {not_sent} members have DMs disabled"
+            if summary['failed']:
+                result += f"\n❌ {summary['failed']} messages failed"
+            await status_message.edit(content=result)
             
         except Exception as e:
             print(f"Error sending match notifications: {e}")
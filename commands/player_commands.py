@@ -4,9 +4,12 @@ from discord import app_commands
 from typing import Optional
 
 class PlayerCommands:
-    def __init__(self, bot, data_manager):
+    def __init__(self, bot, data_manager, value_history, runner, profiler):
         self.bot = bot
         self.data = data_manager
+        self.value_history = value_history
+        self.runner = runner
+        self.profiler = profiler
         self.setup_commands()
     
     def setup_commands(self):
@@ -21,6 +24,7 @@ class PlayerCommands:
             club_id="Club ID to assign player to (optional)",
             image="Upload player image"
         )
+        @self.profiler.timed
         async def create_player(interaction: discord.Interaction, name: str, value: int, position: str, age: int, club_id: Optional[int] = None, image: Optional[discord.Attachment] = None):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -62,6 +66,7 @@ class PlayerCommands:
             
             players.append(player_data)
             self.data.save_players(players)
+            self.value_history.record_snapshot(players, [player_data['id']])
             
             # Create embed response
             embed = discord.Embed(
@@ -90,6 +95,7 @@ class PlayerCommands:
         
         @self.bot.tree.command(name="list_players", description="Display all players or players from a specific club")
         @app_commands.describe(club_id="Filter by club ID (optional)")
+        @self.profiler.timed
         async def list_players(interaction: discord.Interaction, club_id: Optional[int] = None):
             players = self.data.load_players()
             clubs = self.data.load_clubs()
@@ -137,6 +143,7 @@ class PlayerCommands:
         
         @self.bot.tree.command(name="player_info", description="Get detailed information about a specific player")
         @app_commands.describe(player_id="ID of the player to view")
+        @self.profiler.timed
         async def player_info(interaction: discord.Interaction, player_id: int):
             players = self.data.load_players()
             clubs = self.data.load_clubs()
@@ -197,6 +204,7 @@ class PlayerCommands:
             player_id="ID of the player",
             new_value="New market value in Euros"
         )
+        @self.profiler.timed
         async def update_player_value(interaction: discord.Interaction, player_id: int, new_value: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -212,6 +220,9 @@ class PlayerCommands:
             old_value = player['value']
             player['value'] = new_value
             self.data.save_players(players)
+            self.value_history.record_snapshot(players, [player_id])
+            self.data.publish('player.value_changed', player_id=player_id, name=player['name'],
+                              club_id=player.get('club_id'), old_value=old_value, new_value=new_value)
             
             embed = discord.Embed(
                 title="💰 Player Value Updated",
@@ -230,6 +241,7 @@ class PlayerCommands:
             to_club_id="ID of the destination club",
             transfer_fee="Transfer fee in Euros"
         )
+        @self.profiler.timed
         async def transfer_player(interaction: discord.Interaction, player_id: int, to_club_id: int, transfer_fee: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -286,6 +298,11 @@ class PlayerCommands:
             self.data.save_players(players)
             self.data.save_clubs(clubs)
             self.data.save_transfers(transfers)
+            self.value_history.record_snapshot(players, [player_id], [transfer_record['from_club_id']],
+                                               timestamp=transfer_record['timestamp'])
+            self.data.publish('transfer.completed', transfer_id=transfer_record['id'], player_id=player_id,
+                              name=player['name'], from_club_id=transfer_record['from_club_id'],
+                              to_club_id=to_club_id, fee=transfer_fee)
             
             # Create embed response
             embed = discord.Embed(
@@ -312,6 +329,7 @@ class PlayerCommands:
             player_id="ID of the player to remove",
             club_id="ID of the club to remove player from"
         )
+        @self.profiler.timed
         async def remove_player_from_club(interaction: discord.Interaction, player_id: int, club_id: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -342,6 +360,7 @@ class PlayerCommands:
             # Remove player from club
             player['club_id'] = None
             self.data.save_players(players)
+            self.value_history.record_snapshot(players, [player_id], [club_id])
             
             embed = discord.Embed(
                 title="🚫 Player Removed from Club",
@@ -361,6 +380,7 @@ class PlayerCommands:
         
         @self.bot.tree.command(name="release_player", description="Release a player from their club")
         @app_commands.describe(player_id="ID of the player to release")
+        @self.profiler.timed
         async def release_player(interaction: discord.Interaction, player_id: int):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
@@ -384,6 +404,7 @@ class PlayerCommands:
             # Release player
             player['club_id'] = None
             self.data.save_players(players)
+            self.value_history.record_snapshot(players, [player_id], [club['id'] if club else None])
             
             embed = discord.Embed(
                 title="🆓 Player Released",
@@ -394,3 +415,38 @@ class PlayerCommands:
             embed.add_field(name="Status", value="Free Agent", inline=True)
             
             await interaction.response.send_message(embed=embed)
+        
+        @self.bot.tree.command(name="player_value_history", description="Show a player's market value history")
+        @app_commands.describe(player_id="ID of the player")
+        @self.profiler.timed
+        async def player_value_history(interaction: discord.Interaction, player_id: int):
+            # Folds any logged points first, which rewrites the history file
+            summary = await self.runner.run_blocking(self.value_history.get_summary, self.value_history.player_key(player_id))
+            
+            if not summary:
+                await interaction.response.send_message(f"❌ No value history recorded for player ID {player_id}!", ephemeral=True)
+                return
+            
+            players = self.data.load_players()
+            player = next((p for p in players if p['id'] == player_id), None)
+            player_name = player['name'] if player else f"Player {player_id}"
+            
+            embed = discord.Embed(
+                title=f"📈 {player_name} - Value History",
+                description=f"Tracking since <t:{int(summary['first_at'])}:D> • Last change <t:{int(summary['updated_at'])}:R>",
+                color=0x0099ff
+            )
+            
+            embed.add_field(name="💰 Current Value", value=f"€{summary['current']:,}", inline=True)
+            embed.add_field(name="🏁 First Recorded", value=f"€{summary['first']:,}", inline=True)
+            embed.add_field(name="🔄 Changes", value=str(summary.get('changes', 0)), inline=True)
+            
+            embed.add_field(name="📉 Lowest", value=f"€{summary['min']:,}", inline=True)
+            embed.add_field(name="📈 Highest", value=f"€{summary['max']:,}", inline=True)
+            embed.add_field(name="📊 Change", value=f"7d: €{summary['change_7d']:+,}\n30d: €{summary['change_30d']:+,}", inline=True)
+            
+            recent = "\n".join(f"• <t:{int(ts)}:d> €{value:,}" for ts, value in reversed(summary['recent']))
+            embed.add_field(name="🕒 Recent Values", value=recent, inline=False)
+            embed.set_footer(text="Older history is summarized into daily and weekly values")
+            
+            await interaction.response.send_message(embed=embed)
@@ -3,40 +3,38 @@ from discord.ext import commands
 from discord import app_commands
 from collections import defaultdict
 import json
+from utils.charts import render_bar_chart, render_horizontal_bar_chart, pack
 
 class StatsCommands:
-    def __init__(self, bot, data_manager):
+    def __init__(self, bot, data_manager, charts, runner, profiler):
         self.bot = bot
         self.data = data_manager
+        self.charts = charts
+        self.runner = runner
+        self.profiler = profiler
         self.setup_commands()
     
     def setup_commands(self):
         """Setup all statistics-related slash commands"""
         
         @self.bot.tree.command(name="league_stats", description="Display comprehensive league statistics")
+        @self.profiler.timed
+        @self.runner.heavy()
         async def league_stats(interaction: discord.Interaction):
-            clubs = self.data.load_clubs()
-            players = self.data.load_players()
-            transfers = self.data.load_transfers()
-            matches = self.data.load_matches()
+            stats = await self.runner.run_blocking(self.compute_league_stats)
             
-            if not clubs:
-                await interaction.response.send_message("❌ No clubs found in the database!", ephemeral=True)
+            if not stats:
+                await interaction.followup.send("❌ No clubs found in the database!", ephemeral=True)
                 return
             
-            # Calculate statistics
-            total_players = len(players)
-            total_transfers = len(transfers)
-            total_matches = len(matches)
-            total_budget = sum(club.get('budget', 0) for club in clubs)
-            total_player_value = sum(player.get('value', 0) for player in players)
-            
-            # Find richest and poorest clubs
-            richest_club = max(clubs, key=lambda x: x.get('budget', 0))
-            poorest_club = min(clubs, key=lambda x: x.get('budget', 0))
-            
-            # Find most valuable player
-            most_valuable_player = max(players, key=lambda x: x.get('value', 0)) if players else None
+            total_players = stats['total_players']
+            total_transfers = stats['total_transfers']
+            total_matches = stats['total_matches']
+            total_budget = stats['total_budget']
+            total_player_value = stats['total_player_value']
+            richest_club = stats['richest_club']
+            poorest_club = stats['poorest_club']
+            most_valuable_player = stats['most_valuable_player']
             
             embed = discord.Embed(
                 title="📊 League Statistics",
@@ -44,7 +42,7 @@ class StatsCommands:
                 color=0x0099ff
             )
             
-            embed.add_field(name="🏆 Total Clubs", value=str(len(clubs)), inline=True)
+            embed.add_field(name="🏆 Total Clubs", value=str(stats['total_clubs']), inline=True)
             embed.add_field(name="⚽ Total Players", value=str(total_players), inline=True)
             embed.add_field(name="🔄 Total Transfers", value=str(total_transfers), inline=True)
             
@@ -58,10 +56,11 @@ class StatsCommands:
             if most_valuable_player:
                 embed.add_field(name="💎 Most Valuable Player", value=f"{most_valuable_player['name']}\n€{most_valuable_player['value']:,}", inline=True)
             
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
         
         @self.bot.tree.command(name="top_players", description="Display top players by market value")
         @app_commands.describe(limit="Number of players to show (default: 10)")
+        @self.profiler.timed
         async def top_players(interaction: discord.Interaction, limit: int = 10):
             players = self.data.load_players()
             clubs = self.data.load_clubs()
@@ -96,38 +95,23 @@ class StatsCommands:
             await interaction.response.send_message(embed=embed)
         
         @self.bot.tree.command(name="club_rankings", description="Display clubs ranked by total value")
+        @self.profiler.timed
+        @self.runner.heavy()
         async def club_rankings(interaction: discord.Interaction):
-            clubs = self.data.load_clubs()
-            players = self.data.load_players()
+            club_values = await self.runner.run_blocking(self.compute_club_values)
             
-            if not clubs:
-                await interaction.response.send_message("❌ No clubs found in the database!", ephemeral=True)
+            if not club_values:
+                await interaction.followup.send("❌ No clubs found in the database!", ephemeral=True)
                 return
             
-            # Calculate total value for each club (budget + player values)
-            club_values = []
-            for club in clubs:
-                club_players = [p for p in players if p.get('club_id') == club['id']]
-                total_player_value = sum(p.get('value', 0) for p in club_players)
-                total_value = club['budget'] + total_player_value
-                
-                club_values.append({
-                    'club': club,
-                    'player_count': len(club_players),
-                    'player_value': total_player_value,
-                    'total_value': total_value
-                })
-            
-            # Sort by total value
-            club_values.sort(key=lambda x: x['total_value'], reverse=True)
-            
             embed = discord.Embed(
                 title="🏆 Club Rankings by Total Value",
                 description="Clubs ranked by budget + player values",
                 color=0xffd700
             )
             
-            for i, club_data in enumerate(club_values, 1):
+            # Embeds hold at most 25 fields
+            for i, club_data in enumerate(club_values[:25], 1):
                 club = club_data['club']
                 embed.add_field(
                     name=f"{i}. {club['name']}",
@@ -135,10 +119,20 @@ class StatsCommands:
                     inline=True
                 )
             
-            await interaction.response.send_message(embed=embed)
+            # Chart the top 15 clubs, budget and squad value stacked
+            charted = club_values[:15]
+            await self.charts.send_embed(
+                interaction, embed,
+                ('club_rankings', self.data.get_version('clubs.json', 'players.json')),
+                render_horizontal_bar_chart,
+                "Club value (budget + squad)",
+                tuple(c['club']['name'] for c in charted),
+                (pack([c['club']['budget'] for c in charted]), pack([c['player_value'] for c in charted]))
+            )
         
         @self.bot.tree.command(name="transfer_activity", description="Display recent transfer activity")
         @app_commands.describe(limit="Number of transfers to show (default: 10)")
+        @self.profiler.timed
         async def transfer_activity(interaction: discord.Interaction, limit: int = 10):
             transfers = self.data.load_transfers()
             players = self.data.load_players()
@@ -185,6 +179,7 @@ class StatsCommands:
             await interaction.response.send_message(embed=embed)
         
         @self.bot.tree.command(name="position_stats", description="Display player statistics by position")
+        @self.profiler.timed
         async def position_stats(interaction: discord.Interaction):
             players = self.data.load_players()
             
@@ -216,9 +211,18 @@ class StatsCommands:
                     inline=True
                 )
             
-            await interaction.response.send_message(embed=embed)
+            positions = sorted(position_stats)
+            await self.charts.send_embed(
+                interaction, embed,
+                ('position_stats', self.data.get_version('players.json')),
+                render_bar_chart,
+                "Average player value by position",
+                tuple(positions),
+                (pack([sum(p.get('value', 0) for p in position_stats[pos]) / len(position_stats[pos]) for pos in positions]),)
+            )
         
         @self.bot.tree.command(name="age_analysis", description="Display age analysis of all players")
+        @self.profiler.timed
         async def age_analysis(interaction: discord.Interaction):
             players = self.data.load_players()
             
@@ -259,13 +263,26 @@ class StatsCommands:
                         inline=True
                     )
             
-            await interaction.response.send_message(embed=embed)
+            # Age pyramid in three-year bands
+            band_counts = defaultdict(int)
+            for age in ages:
+                band_counts[age - age % 3] += 1
+            bands = sorted(band_counts)
+            await self.charts.send_embed(
+                interaction, embed,
+                ('age_analysis', self.data.get_version('players.json')),
+                render_horizontal_bar_chart,
+                "Players per age band",
+                tuple(f"{band}-{band + 2}" for band in bands),
+                (pack([band_counts[band] for band in bands]),)
+            )
         
         @self.bot.tree.command(name="compare_clubs", description="Compare two clubs side by side")
         @app_commands.describe(
             club1_id="ID of the first club",
             club2_id="ID of the second club"
         )
+        @self.profiler.timed
         async def compare_clubs(interaction: discord.Interaction, club1_id: int, club2_id: int):
             clubs = self.data.load_clubs()
             players = self.data.load_players()
@@ -332,4 +349,61 @@ class StatsCommands:
             if advantages:
                 embed.add_field(name="📈 Key Differences", value="\n".join(advantages), inline=False)
             
-            await interaction.response.send_message(embed=embed)
+            await self.charts.send_embed(
+                interaction, embed,
+                ('compare_clubs', club1_id, club2_id, self.data.get_version('clubs.json', 'players.json')),
+                render_bar_chart,
+                f"{club1['name']} vs {club2['name']}",
+                ("Budget", "Squad Value"),
+                (pack([club1['budget'], club1_player_value]), pack([club2['budget'], club2_player_value]))
+            )
+    
+    def compute_league_stats(self):
+        """League totals for /league_stats; runs on a worker thread"""
+        clubs = self.data.load_clubs()
+        players = self.data.load_players()
+        transfers = self.data.load_transfers()
+        matches = self.data.load_matches()
+        
+        if not clubs:
+            return None
+        
+        return {
+            'total_clubs': len(clubs),
+            'total_players': len(players),
+            'total_transfers': len(transfers),
+            'total_matches': len(matches),
+            'total_budget': sum(club.get('budget', 0) for club in clubs),
+            'total_player_value': sum(player.get('value', 0) for player in players),
+            # Find richest and poorest clubs
+            'richest_club': max(clubs, key=lambda x: x.get('budget', 0)),
+            'poorest_club': min(clubs, key=lambda x: x.get('budget', 0)),
+            # Find most valuable player
+            'most_valuable_player': max(players, key=lambda x: x.get('value', 0)) if players else None
+        }
+    
+    def compute_club_values(self):
+        """Clubs with budget + squad value, highest first; runs on a worker thread"""
+        clubs = self.data.load_clubs()
+        players = self.data.load_players()
+        
+        # Sum player values per club in one pass
+        squad_value = defaultdict(int)
+        squad_size = defaultdict(int)
+        for player in players:
+            squad_value[player.get('club_id')] += player.get('value', 0)
+            squad_size[player.get('club_id')] += 1
+        
+        club_values = [
+            {
+                'club': club,
+                'player_count': squad_size[club['id']],
+                'player_value': squad_value[club['id']],
+                'total_value': club['budget'] + squad_value[club['id']]
+            }
+            for club in clubs
+        ]
+        
+        # Sort by total value
+        club_values.sort(key=lambda x: x['total_value'], reverse=True)
+        return club_values
@@ -1,12 +1,21 @@
 import os
+import sys
 import asyncio
-from bot import DiscordBot
-from keep_alive import keep_alive
+from utils.startup import startup
+
+# Time the heavy third-party imports separately from our own modules. They are
+# imported here only to be timed; bot.py and web_server.py use them.
+with startup.phase('import discord.py'):
+    import discord  # noqa: F401
+with startup.phase('import aiohttp'):
+    import aiohttp  # noqa: F401
+with startup.phase('import bot modules'):
+    from bot import DiscordBot
 
 def main():
     """Main entry point for the bot application"""
-    # Start the keep-alive web server
-    keep_alive()
+    # --profile-startup prints a per-subsystem timing breakdown once the bot is ready
+    startup.verbose = '--profile-startup' in sys.argv[1:]
     
     # Get Discord token from environment variables
     token = os.getenv('DISCORD_TOKEN', 'your_discord_bot_token_here')
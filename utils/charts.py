@@ -0,0 +1,185 @@
+import asyncio
+import importlib.util
+import io
+import multiprocessing
+import os
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+import discord
+
+# Pillow is optional; stats commands fall back to text only. It is only
+# imported inside the worker processes, so startup never pays for it.
+CHARTS_AVAILABLE = importlib.util.find_spec('PIL') is not None
+
+WIDTH = 800
+HEIGHT = 420
+MARGIN = 50
+BACKGROUND = (47, 49, 54)
+TEXT = (230, 230, 230)
+GRID = (80, 83, 90)
+PALETTE = [(0, 153, 255), (255, 215, 0), (255, 107, 107), (153, 50, 204), (0, 200, 120)]
+
+
+# --- Rendering (runs inside worker processes) ---------------------------------
+# These functions only receive short label tuples and numeric arrays so that
+# pickling across the process boundary stays cheap.
+
+def _new_canvas(title: str):
+    from PIL import Image, ImageDraw, ImageFont
+    image = Image.new('RGB', (WIDTH, HEIGHT), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    draw.text((MARGIN, 15), title, fill=TEXT, font=font)
+    return image, draw, font
+
+
+def _to_png(image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _short(value: float) -> str:
+    """Compact euro/number label, e.g. 12.5M"""
+    for limit, suffix in ((1_000_000_000, 'B'), (1_000_000, 'M'), (1_000, 'K')):
+        if abs(value) >= limit:
+            return f"{value / limit:.1f}{suffix}"
+    return f"{value:.0f}"
+
+
+def render_bar_chart(title: str, labels: Tuple[str, ...], series: Tuple[array, ...]) -> bytes:
+    """Vertical bar chart; several series are drawn as grouped bars"""
+    image, draw, font = _new_canvas(title)
+    top, bottom = MARGIN, HEIGHT - MARGIN
+    peak = max((max(values) for values in series if len(values)), default=0) or 1
+
+    draw.line((MARGIN, bottom, WIDTH - MARGIN, bottom), fill=GRID)
+    slot = (WIDTH - 2 * MARGIN) / max(len(labels), 1)
+    bar_width = max(slot * 0.8 / len(series), 1)
+
+    for i, label in enumerate(labels):
+        x0 = MARGIN + i * slot + slot * 0.1
+        for s, values in enumerate(series):
+            value = values[i]
+            bar_height = (bottom - top) * max(value, 0) / peak
+            x = x0 + s * bar_width
+            draw.rectangle((x, bottom - bar_height, x + max(bar_width - 2, 0), bottom), fill=PALETTE[s % len(PALETTE)])
+            draw.text((x, bottom - bar_height - 12), _short(value), fill=TEXT, font=font)
+        draw.text((x0, bottom + 5), label[:14], fill=TEXT, font=font)
+
+    return _to_png(image)
+
+
+def render_horizontal_bar_chart(title: str, labels: Tuple[str, ...], series: Tuple[array, ...]) -> bytes:
+    """Horizontal bar chart; several series are stacked left to right"""
+    image, draw, font = _new_canvas(title)
+    left, right = MARGIN + 90, WIDTH - MARGIN - 50
+    totals = [sum(values[i] for values in series) for i in range(len(labels))]
+    peak = max(totals, default=0) or 1
+
+    row = (HEIGHT - 2 * MARGIN) / max(len(labels), 1)
+    for i, label in enumerate(labels):
+        y = MARGIN + i * row
+        x = left
+        for s, values in enumerate(series):
+            bar_width = (right - left) * max(values[i], 0) / peak
+            draw.rectangle((x, y + 2, x + bar_width, y + row - 2), fill=PALETTE[s % len(PALETTE)])
+            x += bar_width
+        draw.text((MARGIN, y + row / 2 - 6), label[:14], fill=TEXT, font=font)
+        draw.text((x + 5, y + row / 2 - 6), _short(totals[i]), fill=TEXT, font=font)
+
+    return _to_png(image)
+
+
+# --- Event-loop side ---------------------------------------------------------
+
+class ChartRenderer:
+    """Renders charts in a process pool and caches PNGs by data version"""
+
+    def __init__(self, max_workers: Optional[int] = None, cache_size: int = 64):
+        self.max_workers = max_workers or int(os.getenv('CHART_WORKERS', 2))
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.pending: Dict[Any, asyncio.Future] = {}
+        # Created with the bot rather than on the first chart command
+        self.executor = None
+        if CHARTS_AVAILABLE:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._mp_context())
+
+    @staticmethod
+    def _mp_context():
+        # Forking this multi-threaded process (loop monitor, command pool, aiohttp) can
+        # deadlock the child; forkserver and spawn start workers from a clean process
+        methods = multiprocessing.get_all_start_methods()
+        return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+    @property
+    def available(self) -> bool:
+        return self.executor is not None
+
+    def get_cached(self, key) -> Optional[bytes]:
+        png = self.cache.get(key)
+        if png is not None:
+            self.cache.move_to_end(key)
+        return png
+
+    async def render(self, key, func, *args) -> Optional[bytes]:
+        """Render `func(*args)` in a worker process, sharing in-flight renders for the same key"""
+        cached = self.get_cached(key)
+        if cached is not None or not self.available:
+            return cached
+
+        if key in self.pending:
+            try:
+                return await asyncio.shield(self.pending[key])
+            except Exception:
+                return None
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, func, *args)
+        self.pending[key] = future
+        try:
+            png = await future
+        except Exception as e:
+            print(f"Error rendering chart {key}: {e}")
+            return None
+        finally:
+            self.pending.pop(key, None)
+
+        self.cache[key] = png
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return png
+
+    async def send_embed(self, interaction: discord.Interaction, embed: discord.Embed, key, func, *args):
+        """Send `embed` with a rendered chart attached, deferring while a new chart renders"""
+        png = self.get_cached(key)
+        send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+
+        if png is None and self.available:
+            if not interaction.response.is_done():
+                await interaction.response.defer()
+                send = interaction.followup.send
+            png = await self.render(key, func, *args)
+
+        if png is None:
+            await send(embed=embed)
+            return
+
+        filename = f"{key[0]}.png"
+        embed.set_image(url=f"attachment://{filename}")
+        await send(embed=embed, file=discord.File(io.BytesIO(png), filename=filename))
+
+    def shutdown(self):
+        """Stop worker processes"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+def pack(numbers: Sequence[float]) -> array:
+    """Pack numbers into a compact float array for the worker process"""
+    return array('d', numbers)
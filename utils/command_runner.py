@@ -0,0 +1,85 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import os
+import time
+import discord
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Tuple
+from utils.metrics import registry
+from utils.perf import add_offloaded_time
+
+COMMANDS_DEFERRED = registry.counter(
+    'football_bot_commands_deferred_total', 'Heavy commands deferred before running', ('command',)
+)
+
+class CommandRunner:
+    """Execution layer for slash commands that do a lot of data work.
+    
+    Commands marked with `heavy()` are deferred as soon as they arrive, so
+    Discord's 3-second response deadline no longer applies, and do their data
+    work through `run_blocking`, which runs it on a small thread pool instead
+    of the event loop. Their result goes out as a followup message.
+    """
+    
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or int(os.getenv('COMMAND_WORKERS', 4))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='command')
+    
+    def heavy(self, admin_only: bool = False):
+        """Decorator for a command callback: check permissions, defer, then run it.
+        
+        The admin check happens before deferring so the rejection can still be
+        sent as an ephemeral message.
+        """
+        def decorator(func: Callable):
+            @functools.wraps(func)
+            async def wrapper(interaction: discord.Interaction, *args, **kwargs):
+                if admin_only and not interaction.user.guild_permissions.administrator:
+                    await interaction.response.send_message("❌ Only administrators can use this command!", ephemeral=True)
+                    return
+                
+                if not interaction.response.is_done():
+                    await interaction.response.defer(thinking=True)
+                    COMMANDS_DEFERRED.inc(func.__name__)
+                
+                try:
+                    return await func(interaction, *args, **kwargs)
+                except Exception:
+                    # The user is looking at "thinking..."; replace it before the error is logged
+                    with contextlib.suppress(discord.HTTPException):
+                        await interaction.followup.send("❌ Something went wrong while running this command.", ephemeral=True)
+                    raise
+            return wrapper
+        return decorator
+    
+    async def run_blocking(self, func: Callable, *args, **kwargs):
+        """Run synchronous data work on the worker pool and await its result"""
+        loop = asyncio.get_running_loop()
+        # Carry the command's context over so its phase timings see the worker's data time
+        context = contextvars.copy_context()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self.executor, functools.partial(context.run, func, *args, **kwargs))
+        finally:
+            add_offloaded_time(time.perf_counter() - started)
+    
+    async def plan_current(self, data_manager, filenames: Tuple[str, ...], func: Callable, *args,
+                           attempts: int = 3) -> Tuple[Any, bool]:
+        """Run a read-only planner on the worker pool until no save overtook it.
+        
+        `func` returns a dict whose 'version' is data_manager.get_version(*filenames)
+        from before its reads, or a falsy value or a dict with an 'error' when
+        there is nothing to save. Returns (plan, current); with `current` set the
+        caller saves the plan on the event loop before its next await.
+        """
+        for _ in range(attempts):
+            plan = await self.run_blocking(func, *args)
+            if not plan or plan.get('error') or data_manager.get_version(*filenames) == plan['version']:
+                return plan, True
+        return plan, False
+    
+    def shutdown(self):
+        """Stop the worker threads"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+import time
+import discord
+from typing import Optional
+
+class CommandSync:
+    """Sync the slash command tree only when its definition changes.
+    
+    A hash of the serialized command tree is stored per application and
+    scope. On startup the tree is hashed locally and the (slow, rate-limited)
+    sync HTTP call is skipped when the hash matches the last successful sync.
+    Setting DEV_GUILD_ID syncs to that guild only, which updates instantly.
+    """
+    
+    FILENAME = 'command_sync.json'
+    
+    def __init__(self, bot, data_manager):
+        self.bot = bot
+        self.data = data_manager
+        dev_guild_id = os.getenv('DEV_GUILD_ID')
+        self.dev_guild_id = int(dev_guild_id) if dev_guild_id else None
+        self.force = os.getenv('FORCE_COMMAND_SYNC', '').lower() in ('1', 'true', 'yes')
+    
+    def tree_hash(self, guild: Optional[discord.abc.Snowflake] = None) -> str:
+        """Stable hash of the commands that would be synced for `guild` (None = global)"""
+        payload = [command.to_dict(self.bot.tree) for command in self.bot.tree.get_commands(guild=guild)]
+        payload.sort(key=lambda command: (command.get('type', 1), command['name']))
+        encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+    
+    async def sync(self):
+        """Sync the tree if it changed since the last successful sync"""
+        started = time.monotonic()
+        guild = discord.Object(id=self.dev_guild_id) if self.dev_guild_id else None
+        if guild:
+            self.bot.tree.copy_global_to(guild=guild)
+        
+        scope = f"{self.bot.application_id}:{self.dev_guild_id or 'global'}"
+        digest = self.tree_hash(guild)
+        state = self.data.load_object(self.FILENAME)
+        if not self.force and state.get(scope) == digest:
+            print(f"Command tree unchanged ({digest[:12]}), skipping sync")
+            return
+        
+        try:
+            synced = await self.bot.tree.sync(guild=guild)
+        except Exception as e:
+            print(f'Failed to sync commands: {e}')
+            return
+        
+        state[scope] = digest
+        self.data.save_object(self.FILENAME, state)
+        target = f"to guild {self.dev_guild_id}" if guild else "globally"
+        print(f"Synced {len(synced)} command(s) {target} in {time.monotonic() - started:.2f}s")
@@ -0,0 +1,39 @@
+import time
+import discord
+from discord import app_commands
+from typing import Dict, List, Tuple
+
+class TrackedCommandTree(app_commands.CommandTree):
+    """Command tree that remembers which slash commands are currently running.
+    
+    `interaction_check` runs right before a command's callback, so an entry
+    exists even if the callback blocks the loop before yielding. Entries are
+    cleared on completion or error.
+    """
+    
+    # Interaction tokens expire after 15 minutes; anything older is stale
+    MAX_AGE = 15 * 60
+    
+    def __init__(self, client, **kwargs):
+        super().__init__(client, **kwargs)
+        self.in_flight: Dict[int, Tuple[str, float]] = {}
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type == discord.InteractionType.application_command and interaction.command:
+            self.in_flight[interaction.id] = (interaction.command.qualified_name, time.monotonic())
+        return True
+    
+    def finish(self, interaction: discord.Interaction):
+        self.in_flight.pop(interaction.id, None)
+    
+    def describe_in_flight(self) -> List[str]:
+        """Running commands as '/name (Ns)', oldest first; safe to call from another thread"""
+        now = time.monotonic()
+        entries = sorted(list(self.in_flight.items()), key=lambda item: item[1][1])
+        described = []
+        for interaction_id, (name, started) in entries:
+            if now - started > self.MAX_AGE:
+                self.in_flight.pop(interaction_id, None)
+                continue
+            described.append(f"/{name} ({now - started:.1f}s)")
+        return described
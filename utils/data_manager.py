@@ -1,13 +1,43 @@
 import json
 import os
-from typing import List, Dict, Any
+import threading
+import time
+from typing import List, Dict, Any, Tuple
+from utils.metrics import registry
+from utils.events import EventBus
+from utils.perf import add_data_time
+
+DATA_OPERATIONS = registry.counter(
+    'football_bot_data_operations_total', 'Data file loads and saves', ('collection', 'operation')
+)
+DATA_OPERATION_SECONDS = registry.histogram(
+    'football_bot_data_operation_seconds', 'Time spent loading or saving a data file', ('collection', 'operation')
+)
 
 class DataManager:
+    UPCOMING_INDEX = 'upcoming_matches.json'
+    UPCOMING_STATUSES = ('scheduled', 'live')
+    
     def __init__(self):
         """Initialize data manager and ensure data directory exists"""
         self.data_dir = 'data'
-        self.ensure_data_directory()
-        self.initialize_data_files()
+        self.versions = {}
+        # Serializes single file loads and saves between the loop and worker threads.
+        # Never hold it across several operations: the event loop would wait on it.
+        self.lock = threading.RLock()
+        self.events = EventBus()
+        # Files are created on first use rather than at construction, keeping startup cheap
+        self.prepared = False
+    
+    def prepare(self):
+        """Create the data directory and empty data files once, on first access"""
+        if self.prepared:
+            return
+        with self.lock:
+            if not self.prepared:
+                self.ensure_data_directory()
+                self.initialize_data_files()
+                self.prepared = True
     
     def ensure_data_directory(self):
         """Create data directory if it doesn't exist"""
@@ -25,22 +55,145 @@ class DataManager:
     
     def load_data(self, filename: str) -> List[Dict[Any, Any]]:
         """Load data from a JSON file"""
+        self.prepare()
         filepath = os.path.join(self.data_dir, filename)
+        started = time.perf_counter()
         try:
-            with open(filepath, 'r') as f:
+            with self.lock, open(filepath, 'r') as f:
                 data = json.load(f)
                 return data if isinstance(data, list) else []
         except (FileNotFoundError, json.JSONDecodeError):
             return []
+        finally:
+            self._observe(filename, 'load', started)
     
     def save_data(self, filename: str, data: List[Dict[Any, Any]]):
         """Save data to a JSON file"""
+        self.prepare()
         filepath = os.path.join(self.data_dir, filename)
+        started = time.perf_counter()
         try:
-            with open(filepath, 'w') as f:
+            with self.lock, open(filepath, 'w') as f:
                 json.dump(data, f, indent=2)
+                self.versions[filename] = self.versions.get(filename, 0) + 1
         except Exception as e:
             print(f"Error saving data to {filename}: {e}")
+        finally:
+            self._observe(filename, 'save', started)
+    
+    def load_object(self, filename: str) -> Dict[str, Any]:
+        """Load a JSON object (dict) file, returning an empty dict if missing"""
+        self.prepare()
+        filepath = os.path.join(self.data_dir, filename)
+        started = time.perf_counter()
+        try:
+            with self.lock, open(filepath, 'r') as f:
+                data = json.load(f)
+                return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        finally:
+            self._observe(filename, 'load', started)
+    
+    def save_object(self, filename: str, data: Dict[str, Any]):
+        """Save a JSON object (dict) file"""
+        self.prepare()
+        filepath = os.path.join(self.data_dir, filename)
+        started = time.perf_counter()
+        try:
+            with self.lock, open(filepath, 'w') as f:
+                json.dump(data, f)
+                self.versions[filename] = self.versions.get(filename, 0) + 1
+        except Exception as e:
+            print(f"Error saving data to {filename}: {e}")
+        finally:
+            self._observe(filename, 'save', started)
+    
+    def append_records(self, filename: str, records: List[Dict[str, Any]]):
+        """Append records to a newline-delimited JSON log without reading or rewriting it"""
+        self.prepare()
+        filepath = os.path.join(self.data_dir, filename)
+        started = time.perf_counter()
+        try:
+            with self.lock, open(filepath, 'a') as f:
+                f.write(''.join(json.dumps(record) + '\n' for record in records))
+        except Exception as e:
+            print(f"Error appending data to {filename}: {e}")
+        finally:
+            self._observe(filename, 'append', started)
+    
+    def claim_records(self, filename: str) -> List[Dict[str, Any]]:
+        """Move a log's records aside and return them; later appends start a new log.
+        
+        Claimed records stay on disk until release_records(), so records whose
+        processing was interrupted are handed out again by the next claim.
+        Only one caller may claim a given log at a time.
+        """
+        self.prepare()
+        filepath = os.path.join(self.data_dir, filename)
+        claimed = filepath + '.claimed'
+        started = time.perf_counter()
+        try:
+            with self.lock:
+                if os.path.exists(filepath):
+                    if os.path.exists(claimed):
+                        # Left over from an interrupted claim; keep its records first
+                        with open(filepath, 'r') as src, open(claimed, 'a') as dst:
+                            dst.write(src.read())
+                        os.remove(filepath)
+                    else:
+                        os.replace(filepath, claimed)
+            with open(claimed, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        finally:
+            self._observe(filename, 'claim', started)
+        
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass  # a line cut short by a crash
+        return records
+    
+    def release_records(self, filename: str):
+        """Delete the records handed out by claim_records() once they are stored elsewhere"""
+        try:
+            os.remove(os.path.join(self.data_dir, filename) + '.claimed')
+        except FileNotFoundError:
+            pass
+    
+    @staticmethod
+    def _observe(filename: str, operation: str, started: float):
+        elapsed = time.perf_counter() - started
+        collection = os.path.splitext(filename)[0]
+        DATA_OPERATIONS.inc(collection, operation)
+        DATA_OPERATION_SECONDS.observe(elapsed, collection, operation)
+        add_data_time(elapsed)
+    
+    def publish(self, event_type: str, **data):
+        """Announce a change that was just saved to live event subscribers"""
+        self.events.publish(event_type, data)
+    
+    def get_version(self, *filenames: str) -> tuple:
+        """Return a version key that changes whenever any of the given files is saved"""
+        return tuple(self.versions.get(filename, 0) for filename in filenames)
+    
+    def load_consistent(self, *filenames: str, attempts: int = 3) -> Tuple[tuple, Dict[str, List[Dict[Any, Any]]]]:
+        """Load several files without holding the lock across them, for worker threads.
+        
+        Retries while a save lands in between. Returns (version, {filename: records});
+        writers compare the version with get_version() on the event loop right
+        before saving and re-plan if it moved, which also covers running out of attempts.
+        """
+        for _ in range(attempts):
+            version = self.get_version(*filenames)
+            loaded = {filename: self.load_data(filename) for filename in filenames}
+            if self.get_version(*filenames) == version:
+                break
+        return version, loaded
     
     def load_clubs(self) -> List[Dict[Any, Any]]:
         """Load clubs data"""
@@ -63,8 +216,35 @@ class DataManager:
         return self.load_data('matches.json')
     
     def save_matches(self, matches: List[Dict[Any, Any]]):
-        """Save matches data"""
+        """Save matches data and refresh the upcoming matches index"""
         self.save_data('matches.json', matches)
+        self.save_upcoming_index(matches)
+    
+    def save_upcoming_index(self, matches: List[Dict[Any, Any]]):
+        """Write a small, kickoff-sorted index of matches that are not over yet.
+        
+        The scheduler rebuilds its timers from this index at startup, so
+        recovery cost depends on upcoming fixtures rather than match history.
+        """
+        index = [
+            {
+                'id': m['id'],
+                'club1_id': m.get('club1_id'),
+                'club2_id': m.get('club2_id'),
+                'datetime': m.get('datetime'),
+                'status': m.get('status'),
+                'reminder_sent': m.get('reminder_sent', False)
+            }
+            for m in matches if m.get('status') in self.UPCOMING_STATUSES
+        ]
+        index.sort(key=lambda m: m.get('datetime') or '')
+        self.save_data(self.UPCOMING_INDEX, index)
+    
+    def load_upcoming_matches(self) -> List[Dict[Any, Any]]:
+        """Load the upcoming matches index, building it once if it is missing"""
+        if not os.path.exists(os.path.join(self.data_dir, self.UPCOMING_INDEX)):
+            self.save_upcoming_index(self.load_matches())
+        return self.load_data(self.UPCOMING_INDEX)
     
     def load_transfers(self) -> List[Dict[Any, Any]]:
         """Load transfers data"""
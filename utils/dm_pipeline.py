@@ -0,0 +1,103 @@
+import asyncio
+import os
+import random
+import time
+import discord
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
+from utils.metrics import registry
+
+DM_MESSAGES = registry.counter(
+    'football_bot_dm_messages_total', 'Match notification DMs by outcome', ('result',)
+)
+
+class DMPipeline:
+    """Send direct messages through a bounded pool of workers.
+    
+    Users whose DMs are closed are remembered in a negative cache and skipped
+    until the entry expires. When Discord rate limits us, every worker pauses
+    until the limit clears instead of hammering the API.
+    """
+    
+    def __init__(self, max_workers: int = None, max_retries: int = 3, base_delay: float = 1.0):
+        self.max_workers = max_workers or int(os.getenv('DM_CONCURRENCY', 5))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.closed_ttl = int(os.getenv('DM_CLOSED_TTL', 24 * 3600))
+        # user id -> monotonic time when we may try that user again
+        self.closed_dms: Dict[int, float] = {}
+        self.blocked_until = 0.0
+    
+    def is_closed(self, user_id: int) -> bool:
+        expires = self.closed_dms.get(user_id)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self.closed_dms[user_id]
+            return False
+        return True
+    
+    async def deliver(self, messages: List[Tuple[Any, str]],
+                      progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Send each (member, content) pair and return a delivery summary.
+        
+        `progress` is awaited with the running summary as messages complete.
+        """
+        summary = {'total': len(messages), 'sent': 0, 'closed': 0, 'skipped': 0, 'failed': 0, 'done': 0}
+        queue = asyncio.Queue()
+        for member, content in messages:
+            if self.is_closed(member.id):
+                summary['skipped'] += 1
+                DM_MESSAGES.inc('skipped')
+                summary['done'] += 1
+            else:
+                queue.put_nowait((member, content))
+        
+        async def worker():
+            while True:
+                try:
+                    member, content = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self._send(member, content)
+                summary[result] += 1
+                DM_MESSAGES.inc(result)
+                summary['done'] += 1
+                if progress:
+                    await progress(summary)
+        
+        started = time.monotonic()
+        workers = min(self.max_workers, queue.qsize())
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        summary['duration'] = time.monotonic() - started
+        return summary
+    
+    async def _send(self, member, content: str) -> str:
+        retries = 0
+        while True:
+            blocked = self.blocked_until - time.monotonic()
+            if blocked > 0:
+                await asyncio.sleep(blocked)
+            
+            try:
+                await member.send(content)
+                return 'sent'
+            except discord.Forbidden:
+                # DMs disabled or bot blocked: don't try this user again for a while
+                self.closed_dms[member.id] = time.monotonic() + self.closed_ttl
+                return 'closed'
+            except discord.RateLimited as e:
+                delay = e.retry_after
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    print(f"Error sending DM to {member.display_name}: {e}")
+                    return 'failed'
+                delay = self.base_delay * (2 ** retries)
+            except Exception as e:
+                print(f"Error sending DM to {member.display_name}: {e}")
+                return 'failed'
+            
+            if retries >= self.max_retries:
+                return 'failed'
+            
+            retries += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay + random.uniform(0, self.base_delay))
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Iterable, Optional, Set
+from utils.metrics import registry
+
+EVENTS_PUBLISHED = registry.counter(
+    'football_bot_events_published_total', 'Domain events published on the event bus', ('type',)
+)
+EVENTS_DROPPED = registry.counter(
+    'football_bot_events_dropped_total', 'Events dropped because a subscriber queue was full'
+)
+
+class Subscription:
+    """One consumer's bounded queue of encoded events"""
+    
+    def __init__(self, queue_size: int, types: Optional[Set[str]] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.types = types
+        self.dropped = 0
+        # Set when the client resumed from an id we can no longer replay from
+        self.resync = False
+    
+    def put(self, event_type: str, frame: bytes):
+        if self.types and event_type not in self.types:
+            return
+        if self.queue.full():
+            # Slow client: drop its oldest event rather than grow or block the publisher
+            self.queue.get_nowait()
+            self.dropped += 1
+            EVENTS_DROPPED.inc()
+        self.queue.put_nowait(frame)
+
+
+class EventBus:
+    """In-process pub/sub for domain events.
+    
+    Each event is encoded once as a server-sent events frame and pushed to
+    every subscriber's bounded queue, so the cost of a publish is one encode
+    plus a queue put per subscriber, no matter how clients consume it.
+    Recent frames are kept so reconnecting clients can resume from the
+    `Last-Event-ID` they saw.
+    """
+    
+    def __init__(self, queue_size: int = None, history: int = 100):
+        self.queue_size = queue_size or int(os.getenv('EVENT_QUEUE_SIZE', 256))
+        self.subscribers: Set[Subscription] = set()
+        self.recent = deque(maxlen=history)  # (seq, type, frame)
+        self.seq = 0
+        # Sequence numbers restart with the process; the boot id keeps old ids from matching
+        self.boot_id = format(int(time.time()), 'x')
+        registry.gauge('football_bot_event_subscribers', 'Connected event stream subscribers',
+                       lambda: len(self.subscribers))
+    
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """Encode an event and hand it to every subscriber"""
+        self.seq += 1
+        payload = json.dumps({'type': event_type, 'timestamp': time.time(), **data})
+        frame = f"id: {self.boot_id}.{self.seq}\nevent: {event_type}\ndata: {payload}\n\n".encode('utf-8')
+        self.recent.append((self.seq, event_type, frame))
+        EVENTS_PUBLISHED.inc(event_type)
+        for subscription in list(self.subscribers):
+            subscription.put(event_type, frame)
+    
+    def subscribe(self, types: Iterable[str] = None, last_event_id: Optional[str] = None) -> Subscription:
+        """Register a subscriber, replaying retained events after `last_event_id`.
+        
+        If that id is from an earlier boot or older than the retained history,
+        the events in between are gone and the subscription is flagged for a resync.
+        """
+        subscription = Subscription(self.queue_size, set(types) if types else None)
+        boot_id, _, last_seq = (last_event_id or '').partition('.')
+        if boot_id == self.boot_id and last_seq.isdigit():
+            oldest = self.recent[0][0] if self.recent else self.seq + 1
+            subscription.resync = int(last_seq) < oldest - 1
+            for seq, event_type, frame in self.recent:
+                if seq > int(last_seq):
+                    subscription.put(event_type, frame)
+        elif last_event_id:
+            subscription.resync = True
+        self.subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+
+def match_summary(match: Dict[Any, Any]) -> Dict[str, Any]:
+    """The match fields included in match events"""
+    return {
+        'match_id': match['id'],
+        'club1_id': match.get('club1_id'),
+        'club2_id': match.get('club2_id'),
+        'datetime': match.get('datetime'),
+        'status': match.get('status')
+    }
@@ -0,0 +1,151 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from aiohttp import web
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+class DataExporter:
+    """Stream whole collections as NDJSON or CSV.
+    
+    Rows come from the API's shared in-memory snapshots and are written in
+    fixed-size chunks with chunked transfer encoding, so an export never
+    builds the full document and its memory use does not grow with the
+    collection. Each export sees the snapshot it started with, even if the
+    data is saved again while it streams.
+    """
+    
+    CHUNK_ROWS = 500
+    FORMATS = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv'
+    }
+    
+    # collection -> (data file, fields matched by club_id, timestamp field for since/until)
+    COLLECTIONS = {
+        'clubs': ('clubs.json', ('id',), None),
+        'players': ('players.json', ('club_id',), None),
+        'matches': ('matches.json', ('club1_id', 'club2_id'), 'datetime'),
+        'transfers': ('transfers.json', ('from_club_id', 'to_club_id'), 'timestamp')
+    }
+    
+    def __init__(self, api):
+        self.api = api
+    
+    def register(self, app: web.Application):
+        """Add /export/{collection}.{format} to an aiohttp application"""
+        app.router.add_get('/export/{collection}.{format}', self.export)
+    
+    async def export(self, request):
+        name = request.match_info['collection']
+        fmt = request.match_info['format']
+        if name not in self.COLLECTIONS or fmt not in self.FORMATS:
+            raise web.HTTPNotFound()
+        
+        filename, club_fields, time_field = self.COLLECTIONS[name]
+        try:
+            club_id, since, until = self.parse_filters(request.query, time_field)
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+        
+        snap = self.api.snapshot(filename)
+        
+        def rows() -> Iterator[Dict[Any, Any]]:
+            for record in snap.records:
+                if club_id is not None and not any(record.get(field) == club_id for field in club_fields):
+                    continue
+                if since is not None or until is not None:
+                    when = self.record_time(record, time_field)
+                    if when is None or (since is not None and when < since) or (until is not None and when >= until):
+                        continue
+                yield record
+        
+        response = web.StreamResponse(headers={
+            'Content-Type': f'{self.FORMATS[fmt]}; charset=utf-8',
+            'Content-Disposition': f'attachment; filename="{name}.{fmt}"',
+            'Cache-Control': 'no-cache'
+        })
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        
+        if fmt == 'ndjson':
+            await self.write_ndjson(response, rows())
+        else:
+            await self.write_csv(response, rows(), self.columns(rows()))
+        await response.write_eof()
+        return response
+    
+    async def write_ndjson(self, response, rows: Iterator[Dict[Any, Any]]):
+        chunk = []
+        for record in rows:
+            chunk.append(json.dumps(record))
+            if len(chunk) >= self.CHUNK_ROWS:
+                await response.write(('\n'.join(chunk) + '\n').encode('utf-8'))
+                chunk = []
+                await asyncio.sleep(0)  # let other handlers run between chunks
+        if chunk:
+            await response.write(('\n'.join(chunk) + '\n').encode('utf-8'))
+    
+    async def write_csv(self, response, rows: Iterator[Dict[Any, Any]], columns: List[str]):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        count = 0
+        for record in rows:
+            # Nested values (lists, dicts) are written as JSON inside the cell
+            writer.writerow({
+                key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                for key, value in record.items()
+            })
+            count += 1
+            if count % self.CHUNK_ROWS == 0:
+                await response.write(buffer.getvalue().encode('utf-8'))
+                buffer.seek(0)
+                buffer.truncate()
+                await asyncio.sleep(0)
+        if buffer.tell():
+            await response.write(buffer.getvalue().encode('utf-8'))
+    
+    @staticmethod
+    def columns(rows: Iterator[Dict[Any, Any]]) -> List[str]:
+        """Union of keys across the rows, in first-seen order"""
+        columns = {}
+        for record in rows:
+            for key in record:
+                columns.setdefault(key, None)
+        return list(columns)
+    
+    @staticmethod
+    def record_time(record: Dict[Any, Any], field: str) -> Optional[float]:
+        value = record.get(field)
+        if isinstance(value, (int, float)):
+            return float(value)
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def parse_filters(query, time_field: Optional[str]) -> Tuple[Optional[int], Optional[float], Optional[float]]:
+        try:
+            club_id = int(query['club_id']) if query.get('club_id') else None
+        except ValueError:
+            raise ValueError("club_id must be an integer")
+        
+        bounds = []
+        for param in ('since', 'until'):
+            value = query.get(param)
+            if not value:
+                bounds.append(None)
+                continue
+            if time_field is None:
+                raise ValueError(f"{param} is not supported for this collection")
+            try:
+                moment = datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"{param} must be an ISO date or datetime")
+            if param == 'until' and len(value) == 10:
+                moment += timedelta(days=1)  # a bare date includes the whole day
+            bounds.append(moment.timestamp())
+        return club_id, bounds[0], bounds[1]
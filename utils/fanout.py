@@ -0,0 +1,93 @@
+import asyncio
+import os
+import random
+import time
+import discord
+from typing import Dict, Any, List, Tuple
+from utils.metrics import registry
+
+REMINDER_DELIVERIES = registry.counter(
+    'football_bot_reminder_deliveries_total', 'Channel reminder sends by outcome', ('result',)
+)
+REMINDER_RETRIES = registry.counter(
+    'football_bot_reminder_retries_total', 'Channel reminder sends retried after rate limits or server errors'
+)
+
+class MessageFanout:
+    """Deliver one message to many channels concurrently.
+    
+    A semaphore bounds how many sends are in flight, sends to the same channel
+    (Discord's per-route rate-limit bucket) are serialized, and rate-limited or
+    server-side failures are retried with exponential backoff.
+    """
+    
+    def __init__(self, max_concurrency: int = None, max_retries: int = 3, base_delay: float = 1.0):
+        self.max_concurrency = max_concurrency or int(os.getenv('REMINDER_CONCURRENCY', 10))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.route_locks: Dict[int, asyncio.Lock] = {}
+        # channel id -> monotonic time until which the route is rate limited
+        self.route_blocked_until: Dict[int, float] = {}
+    
+    async def deliver(self, targets: List[Tuple[int, Any]], **message) -> Dict[str, Any]:
+        """Send `message` to every (guild_id, channel) target and return a delivery summary"""
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(self._deliver_one(guild_id, channel, message) for guild_id, channel in targets)
+        )
+        
+        summary = {
+            'targets': len(targets),
+            'sent': 0,
+            'failed': 0,
+            'retries': 0,
+            'duration': time.monotonic() - started,
+            'failures': {},
+            'guilds': {}
+        }
+        for guild_id, ok, retries, error in results:
+            summary['retries'] += retries
+            summary['guilds'][guild_id] = ok
+            if ok:
+                summary['sent'] += 1
+            else:
+                summary['failed'] += 1
+                summary['failures'][guild_id] = error
+        REMINDER_DELIVERIES.inc('sent', amount=summary['sent'])
+        REMINDER_DELIVERIES.inc('failed', amount=summary['failed'])
+        REMINDER_RETRIES.inc(amount=summary['retries'])
+        return summary
+    
+    async def _deliver_one(self, guild_id: int, channel, message: Dict[str, Any]):
+        lock = self.route_locks.setdefault(channel.id, asyncio.Lock())
+        retries = 0
+        
+        async with lock:
+            while True:
+                # Wait out a known rate limit on this route without holding a send slot
+                blocked = self.route_blocked_until.get(channel.id, 0) - time.monotonic()
+                if blocked > 0:
+                    await asyncio.sleep(blocked)
+                
+                try:
+                    async with self.semaphore:
+                        await channel.send(**message)
+                    return guild_id, True, retries, None
+                except discord.Forbidden as e:
+                    return guild_id, False, retries, f"forbidden: {e.text or e}"
+                except discord.RateLimited as e:
+                    delay = e.retry_after
+                except discord.HTTPException as e:
+                    if e.status != 429 and e.status < 500:
+                        return guild_id, False, retries, f"http {e.status}: {e.text or e}"
+                    delay = self.base_delay * (2 ** retries)
+                except Exception as e:
+                    return guild_id, False, retries, str(e)
+                
+                if retries >= self.max_retries:
+                    return guild_id, False, retries, "gave up after retries"
+                
+                retries += 1
+                delay += random.uniform(0, self.base_delay)  # jitter so retries don't stampede
+                self.route_blocked_until[channel.id] = time.monotonic() + delay
@@ -0,0 +1,171 @@
+import bisect
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+# How long a club is considered busy after kickoff
+MATCH_DURATION = timedelta(minutes=int(os.getenv('MATCH_DURATION_MINUTES', 120)))
+ACTIVE_STATUSES = ('scheduled', 'live')
+
+def round_robin(club_ids: List[int], double: bool = True) -> List[List[Tuple[int, int]]]:
+    """Build round-robin rounds of (home, away) pairs using the circle method.
+    
+    With an odd number of clubs one club rests each round. A double round-robin
+    repeats every round with home and away swapped.
+    """
+    teams: List[Optional[int]] = list(club_ids)
+    if len(teams) % 2:
+        teams.append(None)  # bye
+    
+    n = len(teams)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            home, away = teams[i], teams[n - 1 - i]
+            if home is None or away is None:
+                continue
+            # Alternate the fixed team's venue so home games are balanced
+            if i == 0 and r % 2:
+                home, away = away, home
+            pairs.append((home, away))
+        rounds.append(pairs)
+        # Rotate every team except the first
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    
+    if double:
+        rounds += [[(away, home) for home, away in pairs] for pairs in rounds]
+    return rounds
+
+
+def schedule_rounds(rounds: List[List[Tuple[int, int]]], start: datetime, spacing: timedelta,
+                    matches_per_day: int) -> List[Tuple[int, int, int, datetime]]:
+    """Assign kickoff times to every fixture.
+    
+    Each round starts on a new day at the start time; within a day kickoffs are
+    `spacing` apart and at most `matches_per_day` are played before moving on
+    to the next day. Returns (round_number, home, away, kickoff) tuples.
+    """
+    fixtures = []
+    day = start
+    for number, pairs in enumerate(rounds, 1):
+        for i, (home, away) in enumerate(pairs):
+            if i and i % matches_per_day == 0:
+                day += timedelta(days=1)
+            kickoff = day + spacing * (i % matches_per_day)
+            fixtures.append((number, home, away, kickoff))
+        day += timedelta(days=1)
+    return fixtures
+
+
+class FixtureIndex:
+    """Per-club sorted kickoff index over active matches for conflict checks.
+
+    Every match occupies [kickoff, kickoff + MATCH_DURATION) for both clubs.
+    Because all intervals have the same length, two matches overlap exactly when
+    their kickoffs are less than one duration apart, so a conflict check is a
+    single bisect into the club's sorted kickoff list.
+
+    The index is rebuilt from matches.json only when the file was saved by
+    someone else since the last sync; callers that save matches themselves
+    call `update` right after the save to keep it current without a rebuild.
+    """
+    
+    def __init__(self, data_manager):
+        self.data = data_manager
+        self.duration = MATCH_DURATION.total_seconds()
+        self.by_club: Dict[int, List[Tuple[float, int]]] = {}
+        self.kickoffs: Dict[int, Tuple[float, int, int]] = {}  # match_id -> (kickoff, club1, club2)
+        self.version = None
+    
+    def _ensure(self):
+        if self.version != self.data.get_version('matches.json'):
+            self.rebuild(self.data.load_matches())
+    
+    def rebuild(self, matches: List[Dict[Any, Any]]):
+        self.by_club = {}
+        self.kickoffs = {}
+        for match in matches:
+            self.insert(match)
+        self.mark_synced()
+    
+    def invalidate(self):
+        """Force a rebuild on the next lookup"""
+        self.version = None
+    
+    def mark_synced(self):
+        """Record that the index reflects the current matches.json"""
+        self.version = self.data.get_version('matches.json')
+    
+    def update(self, match: Dict[Any, Any]):
+        """Apply a match that was just saved.
+        
+        If that save is the only one since the last sync the change is applied
+        in place; otherwise the index is rebuilt on the next lookup.
+        """
+        current = self.data.get_version('matches.json')
+        if self.version is not None and self.version[0] + 1 == current[0]:
+            self.insert(match)
+            self.version = current
+        else:
+            self.invalidate()
+    
+    def insert(self, match: Dict[Any, Any]):
+        """Add (or move) an active match in the index"""
+        self.remove(match['id'])
+        if match.get('status') not in ACTIVE_STATUSES:
+            return
+        try:
+            kickoff = datetime.fromisoformat(match['datetime']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return
+        self.kickoffs[match['id']] = (kickoff, match['club1_id'], match['club2_id'])
+        for club_id in (match['club1_id'], match['club2_id']):
+            bisect.insort(self.by_club.setdefault(club_id, []), (kickoff, match['id']))
+    
+    def remove(self, match_id: int):
+        entry = self.kickoffs.pop(match_id, None)
+        if not entry:
+            return
+        kickoff, club1_id, club2_id = entry
+        for club_id in (club1_id, club2_id):
+            entries = self.by_club.get(club_id, [])
+            i = bisect.bisect_left(entries, (kickoff, match_id))
+            if i < len(entries) and entries[i] == (kickoff, match_id):
+                del entries[i]
+    
+    def find_conflict(self, club_id: int, kickoff: datetime, exclude_match_id: Optional[int] = None) -> Optional[int]:
+        """Return the ID of an active match that overlaps `kickoff` for the club, if any"""
+        self._ensure()
+        start = kickoff.timestamp()
+        entries = self.by_club.get(club_id, [])
+        # First entry whose kickoff is after start - duration; at most two candidates matter
+        i = bisect.bisect_right(entries, (start - self.duration, float('inf')))
+        for other_start, match_id in entries[i:i + 2]:
+            if other_start >= start + self.duration:
+                break
+            if match_id != exclude_match_id:
+                return match_id
+        return None
+    
+    def find_match_conflict(self, club1_id: int, club2_id: int, kickoff: datetime,
+                            exclude_match_id: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """Check both clubs; returns (club_id, conflicting_match_id) or None"""
+        for club_id in (club1_id, club2_id):
+            match_id = self.find_conflict(club_id, kickoff, exclude_match_id)
+            if match_id is not None:
+                return club_id, match_id
+        return None
+    
+    def sweep_conflicts(self) -> List[Tuple[int, int, int]]:
+        """Find every overlapping pair in one pass; returns (club_id, match_id, other_match_id)"""
+        self._ensure()
+        conflicts = []
+        for club_id, entries in self.by_club.items():
+            # Entries are sorted, so each match only needs checking against the next ones
+            for i, (start, match_id) in enumerate(entries):
+                for other_start, other_id in entries[i + 1:]:
+                    if other_start - start >= self.duration:
+                        break
+                    conflicts.append((club_id, match_id, other_id))
+        return conflicts
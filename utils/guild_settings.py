@@ -0,0 +1,80 @@
+import threading
+from typing import Dict, Any, Optional
+
+class GuildSettings:
+    """Per-guild bot settings with an in-memory cache of resolved channels.
+    
+    Settings are persisted as a list of records in guild_settings.json, like the
+    other data files, but kept in a dict keyed by guild ID so lookups are O(1).
+    Resolved channel objects are cached until a channel, role or permission
+    event for that guild invalidates them.
+    """
+    
+    FILENAME = 'guild_settings.json'
+    
+    def __init__(self, data_manager):
+        self.data = data_manager
+        self._settings: Optional[Dict[int, Dict[str, Any]]] = None
+        self._load_lock = threading.Lock()  # startup warms the settings on a worker thread
+        self._channels: Dict[int, Any] = {}
+    
+    @property
+    def settings(self) -> Dict[int, Dict[str, Any]]:
+        """Settings keyed by guild ID, loaded from disk on first use"""
+        if self._settings is None:
+            return self.load()
+        return self._settings
+    
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """Read the settings file unless it was already loaded; safe to call from a worker thread"""
+        with self._load_lock:
+            if self._settings is None:
+                self._settings = {record['guild_id']: record for record in self.data.load_data(self.FILENAME)}
+            return self._settings
+    
+    def get(self, guild_id: int) -> Dict[str, Any]:
+        """Return the settings record for a guild (empty if none saved)"""
+        return self.settings.get(guild_id, {})
+    
+    def set_announcement_channel(self, guild_id: int, channel_id: Optional[int]):
+        """Persist the announcement channel for a guild (None clears it)"""
+        record = self.settings.setdefault(guild_id, {'guild_id': guild_id})
+        record['announcement_channel_id'] = channel_id
+        self.data.save_data(self.FILENAME, list(self.settings.values()))
+        self.invalidate(guild_id)
+    
+    def get_announcement_channel(self, guild):
+        """Resolve the channel reminders should go to, using the cache when possible"""
+        if guild.id in self._channels:
+            return self._channels[guild.id]
+        
+        channel = None
+        channel_id = self.get(guild.id).get('announcement_channel_id')
+        if channel_id:
+            configured = guild.get_channel(channel_id)
+            if configured and configured.permissions_for(guild.me).send_messages:
+                channel = configured
+        
+        if channel is None:
+            # No usable configured channel: fall back to the first channel we can post in
+            channel = next(
+                (c for c in guild.text_channels if c.permissions_for(guild.me).send_messages),
+                None
+            )
+        
+        self._channels[guild.id] = channel
+        return channel
+    
+    def invalidate(self, guild_id: int):
+        """Forget the resolved channel for a guild"""
+        self._channels.pop(guild_id, None)
+    
+    def invalidate_channel(self, channel):
+        """Forget a guild's resolved channel if `channel` could change the resolution"""
+        guild_id = channel.guild.id
+        cached = self._channels.get(guild_id)
+        configured_id = self.get(guild_id).get('announcement_channel_id')
+        # A fallback channel can be outranked by any new, moved or re-permissioned channel
+        using_fallback = cached is not None and cached.id != configured_id
+        if cached is None or using_fallback or cached.id == channel.id or channel.id == configured_id:
+            self.invalidate(guild_id)
@@ -0,0 +1,79 @@
+import gzip
+import hashlib
+import os
+from aiohttp import web
+from typing import Callable, Dict, Hashable, Tuple
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:  # brotli is optional; gzip is always offered
+    BROTLI_AVAILABLE = False
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 256
+
+class CachedBody:
+    """A rendered body with its precompressed variants and content hash ETag"""
+    
+    def __init__(self, body: bytes, content_type: str):
+        self.content_type = content_type
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        self.variants: Dict[str, bytes] = {'identity': body}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.variants['gzip'] = gzip.compress(body, compresslevel=9)
+            if BROTLI_AVAILABLE:
+                self.variants['br'] = brotli.compress(body, quality=11)
+
+
+class ResponseCache:
+    """Rendered responses keyed by name and data version.
+    
+    A body is rendered and compressed once per version, then every request
+    until the next change is a dictionary lookup plus, for clients that send
+    If-None-Match, an empty 304.
+    """
+    
+    def __init__(self, max_age: int = None):
+        self.max_age = max_age if max_age is not None else int(os.getenv('DASHBOARD_MAX_AGE', 10))
+        self.entries: Dict[str, Tuple[Hashable, CachedBody]] = {}
+    
+    def get(self, name: str, version: Hashable, render: Callable[[], Tuple[bytes, str]]) -> CachedBody:
+        """Return the cached body for `version`, rendering it if the version changed"""
+        cached = self.entries.get(name)
+        if cached and cached[0] == version:
+            return cached[1]
+        body, content_type = render()
+        entry = CachedBody(body, content_type)
+        self.entries[name] = (version, entry)
+        return entry
+    
+    def respond(self, request, entry: CachedBody) -> web.Response:
+        """Serve an entry with conditional GET and the best encoding the client accepts"""
+        headers = {
+            'ETag': entry.etag,
+            'Cache-Control': f'public, max-age={self.max_age}',
+            'Vary': 'Accept-Encoding'
+        }
+        if_none_match = request.headers.get('If-None-Match', '')
+        if entry.etag in [tag.strip().replace('W/', '', 1) for tag in if_none_match.split(',')]:
+            return web.Response(status=304, headers=headers)
+        
+        encoding = self.choose_encoding(request.headers.get('Accept-Encoding', ''), entry)
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return web.Response(body=entry.variants[encoding], content_type=entry.content_type,
+                            charset='utf-8', headers=headers)
+    
+    @staticmethod
+    def choose_encoding(accept_encoding: str, entry: CachedBody) -> str:
+        accepted = set()
+        for part in accept_encoding.split(','):
+            name, _, params = part.strip().partition(';')
+            if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                continue
+            accepted.add(name.strip().lower())
+        for encoding in ('br', 'gzip'):
+            if encoding in entry.variants and (encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
@@ -0,0 +1,182 @@
+import bisect
+import json
+import time
+from aiohttp import web
+from typing import Dict, Any, List, Optional, Tuple
+
+class CollectionSnapshot:
+    """Parsed, id-sorted copy of one data file at a given version"""
+    
+    def __init__(self, version: int, records: List[Dict[Any, Any]]):
+        self.version = version
+        self.records = sorted(records, key=lambda r: r.get('id', 0))
+        self.ids = [r.get('id', 0) for r in self.records]
+        # query string -> encoded response body for this version
+        self.responses: Dict[str, bytes] = {}
+
+
+class LeagueAPI:
+    """Read-only JSON endpoints for league data.
+    
+    Each collection is parsed once per DataManager version and served from
+    memory. Responses carry an ETag built from that version, so polling
+    clients get a 304 without any work until the league actually changes.
+    Pages are cursor based: `cursor` is the last id of the previous page.
+    """
+    
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 200
+    RESPONSE_CACHE_SIZE = 128
+    
+    # endpoint -> (data file, {query parameter: (type, record fields it matches)})
+    COLLECTIONS = {
+        'clubs': ('clubs.json', {}),
+        'players': ('players.json', {
+            'club_id': (int, ('club_id',)),
+            'position': (str, ('position',))
+        }),
+        'matches': ('matches.json', {
+            'club_id': (int, ('club1_id', 'club2_id')),
+            'status': (str, ('status',))
+        }),
+        'transfers': ('transfers.json', {
+            'club_id': (int, ('from_club_id', 'to_club_id')),
+            'player_id': (int, ('player_id',))
+        })
+    }
+    
+    SUMMARY_FILES = ('clubs.json', 'players.json', 'matches.json', 'transfers.json')
+    
+    def __init__(self, data_manager):
+        self.data = data_manager
+        self.snapshots: Dict[str, CollectionSnapshot] = {}
+        self._summary = None  # (version, summary)
+        # Versions restart with the process, so ETags are tagged with a boot id
+        self.boot_id = format(int(time.time()), 'x')
+    
+    def register(self, app: web.Application):
+        """Add the /api routes to an aiohttp application"""
+        for name in self.COLLECTIONS:
+            app.router.add_get(f'/api/{name}', self.make_handler(name))
+    
+    def make_handler(self, name: str):
+        async def handler(request):
+            return self.respond(request, name)
+        return handler
+    
+    def snapshot(self, filename: str) -> CollectionSnapshot:
+        """Return the in-memory copy of a data file, reloading it only after a save"""
+        version = self.data.get_version(filename)[0]
+        snap = self.snapshots.get(filename)
+        if snap is None or snap.version != version:
+            snap = CollectionSnapshot(version, self.data.load_data(filename))
+            self.snapshots[filename] = snap
+        return snap
+    
+    def summary_version(self) -> tuple:
+        return self.data.get_version(*self.SUMMARY_FILES)
+    
+    def league_summary(self) -> Dict[str, Any]:
+        """Headline league numbers, recomputed only after one of the files changes"""
+        version = self.summary_version()
+        if self._summary and self._summary[0] == version:
+            return self._summary[1]
+        
+        clubs, players, matches, transfers = (self.snapshot(f).records for f in self.SUMMARY_FILES)
+        summary = {
+            'clubs': len(clubs),
+            'players': len(players),
+            'free_agents': sum(1 for p in players if not p.get('club_id')),
+            'total_player_value': sum(p.get('value', 0) for p in players),
+            'upcoming_matches': sum(1 for m in matches if m.get('status') in ('scheduled', 'live')),
+            'live_matches': sum(1 for m in matches if m.get('status') == 'live'),
+            'transfers': len(transfers),
+            'total_transfer_fees': sum(t.get('fee', 0) for t in transfers)
+        }
+        self._summary = (version, summary)
+        return summary
+    
+    def etag(self, filename: str) -> str:
+        return f'"{self.boot_id}-{self.data.get_version(filename)[0]}"'
+    
+    @staticmethod
+    def etag_matches(request, etag: str) -> bool:
+        header = request.headers.get('If-None-Match')
+        if not header:
+            return False
+        tags = [tag.strip() for tag in header.split(',')]
+        return '*' in tags or any(tag.replace('W/', '', 1) == etag for tag in tags)
+    
+    def respond(self, request, name: str) -> web.Response:
+        filename, filters = self.COLLECTIONS[name]
+        etag = self.etag(filename)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if self.etag_matches(request, etag):
+            return web.Response(status=304, headers=headers)
+        
+        snap = self.snapshot(filename)
+        key = request.query_string
+        body = snap.responses.get(key)
+        if body is None:
+            try:
+                limit, cursor, conditions = self.parse_query(request.query, filters)
+            except ValueError as e:
+                return web.json_response({'error': str(e)}, status=400)
+            
+            items, next_cursor = self.page(snap, limit, cursor, conditions)
+            body = json.dumps({
+                'items': items,
+                'count': len(items),
+                'next_cursor': next_cursor
+            }).encode('utf-8')
+            
+            if len(snap.responses) >= self.RESPONSE_CACHE_SIZE:
+                snap.responses.pop(next(iter(snap.responses)))
+            snap.responses[key] = body
+        
+        return web.Response(body=body, content_type='application/json', headers=headers)
+    
+    def parse_query(self, query, filters) -> Tuple[int, Optional[int], List[Tuple[Tuple[str, ...], Any]]]:
+        try:
+            limit = int(query.get('limit', self.DEFAULT_LIMIT))
+            cursor = int(query['cursor']) if query.get('cursor') else None
+        except ValueError:
+            raise ValueError("limit and cursor must be integers")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        
+        conditions = []
+        for param, (kind, fields) in filters.items():
+            if param not in query:
+                continue
+            try:
+                value = kind(query[param])
+            except ValueError:
+                raise ValueError(f"{param} must be an integer")
+            if kind is str:
+                value = value.lower()
+            conditions.append((fields, value))
+        return min(limit, self.MAX_LIMIT), cursor, conditions
+    
+    @staticmethod
+    def page(snap: CollectionSnapshot, limit: int, cursor: Optional[int], conditions) -> Tuple[List[Dict[Any, Any]], Optional[int]]:
+        """Collect up to `limit` matching records after `cursor`; returns (items, next_cursor)"""
+        start = bisect.bisect_right(snap.ids, cursor) if cursor is not None else 0
+        items = []
+        for i in range(start, len(snap.records)):
+            record = snap.records[i]
+            if not all(
+                any(LeagueAPI.field_matches(record.get(field), value) for field in fields)
+                for fields, value in conditions
+            ):
+                continue
+            if len(items) == limit:
+                return items, items[-1].get('id')
+            items.append(record)
+        return items, None
+    
+    @staticmethod
+    def field_matches(field_value, value) -> bool:
+        if isinstance(value, str):
+            return isinstance(field_value, str) and field_value.lower() == value
+        return field_value == value
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+from utils.metrics import registry
+
+class LoopLagMonitor:
+    """Measure event-loop lag by timing how late a periodic sleep wakes up.
+    
+    Anything that blocks the loop (sync file I/O, heavy computation in a
+    handler) shows up as a wakeup later than requested. A watchdog thread
+    watches the probe's heartbeat; when the loop has been stuck for longer
+    than the stall threshold it captures the loop thread's stack while the
+    blocking call is still running and logs it with the commands in flight.
+    """
+    
+    STACK_LIMIT = 30
+    
+    def __init__(self, interval: float = None, stall_threshold: float = None,
+                 context: Callable[[], List[str]] = None):
+        self.interval = interval or float(os.getenv('LOOP_LAG_INTERVAL', 0.5))
+        self.stall_threshold = stall_threshold or float(os.getenv('LOOP_STALL_THRESHOLD', 1.0))
+        # Returns descriptions of the slash commands currently executing
+        self.context = context or (lambda: [])
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.last_stall: Optional[Dict[str, Any]] = None
+        self.heartbeat = time.monotonic()
+        self.loop_thread_id = None
+        self.task: Optional[asyncio.Task] = None
+        self.watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._captured: Optional[Dict[str, Any]] = None  # set by the watchdog during a stall
+        self.lag_seconds = registry.histogram(
+            'football_bot_event_loop_lag_seconds',
+            'How late periodic event loop wakeups ran',
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+        )
+        self.stall_seconds = registry.histogram(
+            'football_bot_event_loop_stall_seconds',
+            'Duration of event loop stalls over the threshold',
+            buckets=(1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+        )
+        registry.gauge('football_bot_event_loop_lag_last_seconds', 'Lag of the most recent probe', lambda: self.last_lag)
+        self.stall_count = registry.counter('football_bot_event_loop_stalls_total', 'Event loop stalls over the threshold')
+    
+    def start(self):
+        if self.task is None or self.task.done():
+            self.loop_thread_id = threading.get_ident()
+            self.heartbeat = time.monotonic()
+            self.task = asyncio.create_task(self.run())
+        if self.watchdog is None or not self.watchdog.is_alive():
+            self._stopping.clear()
+            self.watchdog = threading.Thread(target=self.watch, name='loop-watchdog', daemon=True)
+            self.watchdog.start()
+    
+    async def run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.heartbeat = now
+            lag = max(0.0, now - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.lag_seconds.observe(lag)
+            if lag >= self.stall_threshold:
+                self.record_stall(lag)
+    
+    def record_stall(self, duration: float):
+        captured, self._captured = self._captured, None
+        self.stalls += 1
+        self.stall_count.inc()
+        self.stall_seconds.observe(duration)
+        self.last_stall = {
+            'at': time.time(),
+            'duration': duration,
+            'commands': captured['commands'] if captured else self.context(),
+            'stack': captured['stack'] if captured else None
+        }
+        print(f"⚠️ Event loop stalled for {duration:.2f}s")
+    
+    def watch(self):
+        """Watchdog thread: capture the loop thread's stack while it is stuck"""
+        poll = min(self.interval, self.stall_threshold) / 2
+        reported_beat = None
+        while not self._stopping.wait(poll):
+            beat = self.heartbeat
+            stalled_for = time.monotonic() - beat - self.interval
+            if stalled_for < self.stall_threshold or beat == reported_beat:
+                continue
+            reported_beat = beat  # one capture per stall
+            
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = traceback.format_stack(frame, limit=self.STACK_LIMIT) if frame else []
+            commands = self.context()
+            self._captured = {'stack': ''.join(stack), 'commands': commands}
+            print(
+                f"⚠️ Event loop blocked for {stalled_for:.2f}s so far; "
+                f"commands in flight: {', '.join(commands) or 'none'}\n"
+                f"Loop thread stack (most recent call last):\n{''.join(stack)}"
+            )
+    
+    def stats(self) -> Dict[str, Any]:
+        """Lag and stall summary for /health"""
+        last = self.last_stall
+        return {
+            'lag': self.last_lag,
+            'max_lag': self.max_lag,
+            'stalls': self.stalls,
+            'last_stall': {
+                'at': last['at'],
+                'duration': last['duration'],
+                'commands': last['commands']
+            } if last else None
+        }
+    
+    def stop(self):
+        self._stopping.set()
+        if self.task:
+            self.task.cancel()
+            self.task = None
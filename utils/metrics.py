@@ -0,0 +1,225 @@
+import bisect
+import os
+import sys
+import threading
+from collections import deque
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+class RollingHistogram:
+    """Keeps the most recent samples of a measurement for percentile reporting"""
+    
+    def __init__(self, size: int = 1000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+    
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+    
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile over the retained samples (0 when empty)"""
+        if not self.samples:
+            return 0.0
+        return self._rank(sorted(self.samples), p)
+    
+    @staticmethod
+    def _rank(ordered, p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary of the window: count is all-time, the rest cover retained samples"""
+        if not self.samples:
+            return {'count': self.count, 'mean': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean': sum(ordered) / len(ordered),
+            'p50': self._rank(ordered, 50),
+            'p90': self._rank(ordered, 90),
+            'p99': self._rank(ordered, 99),
+            'max': ordered[-1]
+        }
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values: Dict[Tuple, float] = {}
+        # Data layer metrics are updated from the command worker threads too
+        self.lock = threading.Lock()
+    
+    def inc(self, *label_values, amount: float = 1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+    
+    def render(self) -> List[str]:
+        with self.lock:
+            values = list(self.values.items())
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}'
+                for key, value in values]
+
+
+class Histogram:
+    """Cumulative bucketed histogram in the Prometheus exposition format"""
+    
+    kind = 'histogram'
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.values: Dict[Tuple, List[float]] = {}
+        self.lock = threading.Lock()  # see Counter
+    
+    def observe(self, value: float, *label_values):
+        with self.lock:
+            counts = self.values.get(label_values)
+            if counts is None:
+                counts = self.values[label_values] = [0] * (len(self.buckets) + 2)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+    
+    def render(self) -> List[str]:
+        with self.lock:
+            values = [(key, list(counts)) for key, counts in self.values.items()]
+        lines = []
+        for key, counts in values:
+            running = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                running += count
+                labels = _format_labels(self.labels + ('le',), key + (_format_value(bound),))
+                lines.append(f'{self.name}_bucket{labels} {running}')
+            labels = _format_labels(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(counts[-1])}')
+            lines.append(f'{self.name}_count{labels} {running}')
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time.
+    
+    The callback returns a number, or a dict of label-value tuples to numbers.
+    """
+    
+    kind = 'gauge'
+    
+    def __init__(self, name: str, help_text: str, func: Callable[[], Any], labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.func = func
+        self.labels = labels
+    
+    def render(self) -> List[str]:
+        value = self.func()
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            return [f'{self.name} {_format_value(value)}']
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_value(v)}' for key, v in value.items()]
+
+
+class RollingSummary:
+    """Expose a RollingHistogram as a Prometheus summary with quantiles"""
+    
+    kind = 'summary'
+    QUANTILES = (50, 90, 99)
+    
+    def __init__(self, name: str, help_text: str, histogram: RollingHistogram):
+        self.name = name
+        self.help = help_text
+        self.histogram = histogram
+    
+    def render(self) -> List[str]:
+        ordered = sorted(self.histogram.samples)
+        lines = []
+        for q in self.QUANTILES:
+            value = self.histogram._rank(ordered, q) if ordered else 0.0
+            lines.append(f'{self.name}{{quantile="{q / 100}"}} {_format_value(value)}')
+        lines.append(f'{self.name}_sum {_format_value(self.histogram.total)}')
+        lines.append(f'{self.name}_count {self.histogram.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together for /metrics"""
+    
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+    
+    def register(self, metric):
+        # Re-registering a name replaces it, so rebuilt objects don't duplicate series
+        self.metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+    
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = None) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+    
+    def gauge(self, name: str, help_text: str, func: Callable[[], Any], labels: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, func, labels))
+    
+    def summary(self, name: str, help_text: str, histogram: RollingHistogram) -> RollingSummary:
+        return self.register(RollingSummary(name, help_text, histogram))
+    
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in list(self.metrics.values()):
+            try:
+                samples = metric.render()
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {e}")
+                continue
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Current resident set size of this process, if the platform exposes it"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+# Process-wide registry shared by the data layer, delivery code and web server
+registry = MetricsRegistry()
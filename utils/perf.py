@@ -0,0 +1,140 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from utils.metrics import registry, RollingHistogram
+
+COMMAND_PHASE_SECONDS = registry.histogram(
+    'football_bot_command_phase_seconds', 'Time each command spends per phase', ('command', 'phase')
+)
+
+PHASES = ('total', 'load', 'compute', 'send', 'queued')
+
+class CommandTiming:
+    """Phase accounting for one command invocation"""
+    
+    def __init__(self):
+        self.loop_thread = threading.get_ident()
+        self.running = 0.0          # time the handler itself ran on the event loop
+        self.data_on_loop = 0.0     # DataManager time inside `running`
+        self.data_offloaded = 0.0   # DataManager time on worker threads
+        self.offloaded = 0.0        # total time of work sent to worker threads
+    
+    def add_data(self, seconds: float):
+        if threading.get_ident() == self.loop_thread:
+            self.data_on_loop += seconds
+        else:
+            self.data_offloaded += seconds
+
+
+_current: contextvars.ContextVar[Optional[CommandTiming]] = contextvars.ContextVar('command_timing', default=None)
+
+
+def add_data_time(seconds: float):
+    """Called by the data layer after each file load or save"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add_data(seconds)
+
+
+def add_offloaded_time(seconds: float):
+    """Called by the command runner after work on a worker thread finishes"""
+    timing = _current.get()
+    if timing is not None:
+        timing.offloaded += seconds
+
+
+class _TimedCoroutine:
+    """Drive a coroutine step by step, adding up the time spent inside each step.
+    
+    Everything between steps is time the handler was suspended, i.e. waiting
+    on Discord or on a worker thread.
+    """
+    
+    def __init__(self, coro, timing: CommandTiming):
+        self.coro = coro
+        self.timing = timing
+    
+    def __await__(self):
+        steps = self.coro.__await__()
+        value, error = None, None
+        while True:
+            started = time.perf_counter()
+            try:
+                yielded = steps.throw(error) if error is not None else steps.send(value)
+            except StopIteration as stop:
+                self.timing.running += time.perf_counter() - started
+                return stop.value
+            except BaseException:
+                self.timing.running += time.perf_counter() - started
+                raise
+            self.timing.running += time.perf_counter() - started
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class CommandProfiler:
+    """Per-command phase timings with rolling percentiles.
+    
+    `timed` wraps a command callback and splits its wall time into:
+      load    - DataManager file loads and saves
+      compute - the rest of the handler's own work, on the loop or a worker
+      send    - time suspended waiting on Discord (responses, defers, fetches)
+    plus `queued`, the delay between Discord creating the interaction and
+    the handler starting, which is not part of `total`.
+    Invocations slower than the threshold are logged with their arguments.
+    """
+    
+    def __init__(self, window: int = 500):
+        self.window = window
+        self.slow_threshold = float(os.getenv('PERF_SLOW_THRESHOLD', 1.0))
+        # command name -> phase -> RollingHistogram
+        self.commands: Dict[str, Dict[str, RollingHistogram]] = {}
+        self.slow: List[Dict[str, Any]] = []
+    
+    def timed(self, func: Callable):
+        """Decorator for a command callback"""
+        @functools.wraps(func)
+        async def wrapper(interaction, *args, **kwargs):
+            queued = max(0.0, (datetime.now(timezone.utc) - interaction.created_at).total_seconds())
+            timing = CommandTiming()
+            token = _current.set(timing)
+            started = time.perf_counter()
+            try:
+                return await _TimedCoroutine(func(interaction, *args, **kwargs), timing)
+            finally:
+                _current.reset(token)
+                self.record(func.__name__, time.perf_counter() - started, timing, kwargs, queued)
+        return wrapper
+    
+    def record(self, name: str, total: float, timing: CommandTiming, arguments: Dict[str, Any], queued: float = 0.0):
+        load = timing.data_on_loop + timing.data_offloaded
+        compute = max(0.0, timing.running - timing.data_on_loop) + max(0.0, timing.offloaded - timing.data_offloaded)
+        send = max(0.0, total - timing.running - timing.offloaded)
+        phases = {'total': total, 'load': load, 'compute': compute, 'send': send, 'queued': queued}
+        
+        histograms = self.commands.setdefault(name, {phase: RollingHistogram(self.window) for phase in PHASES})
+        for phase, seconds in phases.items():
+            histograms[phase].observe(seconds)
+            COMMAND_PHASE_SECONDS.observe(seconds, name, phase)
+        
+        if total >= self.slow_threshold:
+            args = {key: getattr(value, 'id', value) for key, value in arguments.items()}
+            entry = {'command': name, 'at': time.time(), 'args': args, **phases}
+            self.slow = (self.slow + [entry])[-20:]
+            print(f"Slow command /{name} {args}: {total:.2f}s "
+                  f"(load {load:.2f}s, compute {compute:.2f}s, send {send:.2f}s)")
+    
+    def report(self) -> List[Dict[str, Any]]:
+        """Per-command snapshots, slowest p90 first"""
+        rows = [
+            {'command': name, **{phase: histogram.snapshot() for phase, histogram in histograms.items()}}
+            for name, histograms in self.commands.items()
+        ]
+        rows.sort(key=lambda row: row['total']['p90'], reverse=True)
+        return rows
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+import discord
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.metrics import registry
+
+ROLE_MEMBER_FETCHES = registry.counter(
+    'football_bot_role_member_fetches_total', 'Member list scans to resolve role holders'
+)
+
+class RoleMemberResolver:
+    """Role membership that does not depend on discord.py's member cache.
+    
+    MEMBER_CACHE selects the policy:
+      all   - cache every member (discord.py default) and read role.members
+      roles - cache no members in discord.py; keep only the holders of roles
+              we resolve, per role id, for MEMBER_CACHE_TTL seconds
+      none  - cache nothing; resolve role holders on every call
+    Resolution pages through the guild's member list (1000 per request) and
+    keeps only members holding one of the requested roles, so resident memory
+    follows the roles we notify rather than the size of the server. Role
+    changes are only reported for members discord.py caches, so under `roles`
+    a cached list can be stale until it expires.
+    """
+    
+    POLICIES = ('all', 'roles', 'none')
+    
+    def __init__(self, policy: Optional[str] = None, ttl: Optional[float] = None):
+        self.policy = (policy or os.getenv('MEMBER_CACHE', 'roles')).lower()
+        if self.policy not in self.POLICIES:
+            print(f"Unknown MEMBER_CACHE policy {self.policy!r}, using 'roles'")
+            self.policy = 'roles'
+        self.ttl = ttl if ttl is not None else float(os.getenv('MEMBER_CACHE_TTL', 600))
+        # role id -> (monotonic expiry, members holding the role)
+        self.cache: Dict[int, Tuple[float, List[discord.Member]]] = {}
+        # guild id -> [lock, callers using it]; dropped when the last caller leaves
+        self._locks: Dict[int, list] = {}
+        registry.gauge('football_bot_role_member_cache_members', 'Role holders kept in the role member cache',
+                       lambda: sum(len(members) for _, members in self.cache.values()))
+    
+    def cache_flags(self) -> Optional[discord.MemberCacheFlags]:
+        """Member cache flags for the client (None keeps discord.py's default)"""
+        return None if self.policy == 'all' else discord.MemberCacheFlags.none()
+    
+    @property
+    def chunk_at_startup(self) -> bool:
+        return self.policy == 'all'
+    
+    async def members(self, role: discord.Role) -> List[discord.Member]:
+        """Members holding `role`"""
+        return (await self.resolve(role.guild, [role.id]))[role.id]
+    
+    async def resolve(self, guild: discord.Guild, role_ids: Iterable[int]) -> Dict[int, List[discord.Member]]:
+        """Members holding each of `role_ids`, fetching all missing roles in a single scan"""
+        role_ids = set(role_ids)
+        if self.policy == 'all':
+            return {role_id: list(role.members) if (role := guild.get_role(role_id)) else [] for role_id in role_ids}
+        
+        resolved, missing = self._cached(role_ids)
+        if missing:
+            # Concurrent notifications for the same guild share one scan
+            entry = self._locks.setdefault(guild.id, [asyncio.Lock(), 0])
+            entry[1] += 1
+            try:
+                async with entry[0]:
+                    cached, missing = self._cached(missing)
+                    resolved.update(cached)
+                    if missing:
+                        resolved.update(await self._fetch(guild, missing))
+            finally:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[guild.id]
+        return resolved
+    
+    def invalidate(self, role_id: int):
+        """Forget the cached holders of a role"""
+        self.cache.pop(role_id, None)
+    
+    def _cached(self, role_ids: Iterable[int]) -> Tuple[Dict[int, List[discord.Member]], set]:
+        now = time.monotonic()
+        found, missing = {}, set()
+        for role_id in role_ids:
+            entry = self.cache.get(role_id)
+            if entry and entry[0] > now:
+                found[role_id] = entry[1]
+            else:
+                self.cache.pop(role_id, None)
+                missing.add(role_id)
+        return found, missing
+    
+    async def _fetch(self, guild: discord.Guild, role_ids: set) -> Dict[int, List[discord.Member]]:
+        started = time.monotonic()
+        holders: Dict[int, List[discord.Member]] = {role_id: [] for role_id in role_ids}
+        scanned = 0
+        async for member in guild.fetch_members(limit=None):
+            scanned += 1
+            for role_id in role_ids:
+                if member.get_role(role_id) is not None:
+                    holders[role_id].append(member)
+        ROLE_MEMBER_FETCHES.inc()
+        
+        if self.policy == 'roles' and self.ttl > 0:
+            expires = time.monotonic() + self.ttl
+            for role_id, members in holders.items():
+                self.cache[role_id] = (expires, members)
+        print(f"Resolved {len(role_ids)} role(s) in {guild.name}: "
+              f"{sum(len(m) for m in holders.values())} holders of {scanned} members in {time.monotonic() - started:.2f}s")
+        return holders
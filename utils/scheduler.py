@@ -1,155 +1,530 @@
 import asyncio
+import heapq
+import itertools
+import os
+import time
 import discord
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple
+from utils.fanout import MessageFanout
+from utils.sharding import shard_connected
+from utils.fixtures import MATCH_DURATION
+from utils.events import match_summary
+from utils.metrics import RollingHistogram
 
 class MatchScheduler:
-    def __init__(self, bot, data_manager):
+    REMINDER_LEAD = timedelta(minutes=5)
+    # Timer kinds, in the order they are handled when due in the same batch
+    TIMER_KINDS = ('reminder', 'kickoff', 'finish')
+    MAX_SLEEP = 3600  # re-check the heap at least hourly to absorb wall-clock jumps
+    REMINDER_RETRY_DELAY = 60  # seconds before retrying the guilds a reminder did not reach
+    
+    def __init__(self, bot, data_manager, guild_settings):
         self.bot = bot
         self.data = data_manager
-        self.active_reminders = {}
+        self.guild_settings = guild_settings
+        # What to do with reminders that fell due while the bot was offline:
+        # 'send' delivers them late if they are at most `catchup_window` seconds
+        # overdue, 'skip' drops every overdue reminder.
+        self.catchup_policy = os.getenv('REMINDER_CATCHUP', 'send').lower()
+        self.catchup_window = int(os.getenv('REMINDER_CATCHUP_WINDOW', 600))
+        # Reminders due within this many seconds of each other go out as one digest.
+        # The digest goes out when its first reminder is due, so later ones in
+        # the window are sent up to `digest_window` seconds early.
+        self.digest_window = int(os.getenv('REMINDER_DIGEST_WINDOW', 120))
+        # Min-heap of (due_epoch, seq, match_id, kind). Cancelled or re-keyed
+        # entries stay in the heap as tombstones and are skipped when popped.
+        self.timers: List[Tuple[float, int, int, str]] = []
+        # (match_id, kind) -> seq of the live heap entry
+        self.timer_keys: Dict[Tuple[int, str], int] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        # Shared by every shard: Discord's global rate limit applies to the whole bot token
+        self.fanout = MessageFanout()
+        # match id -> guilds its reminder reached or is being sent to, kept until kickoff
+        self.reminder_progress: Dict[int, Set[int]] = {}
+        self.delivery_tasks: Set[asyncio.Task] = set()
+        # Timing instrumentation
+        self.reminder_lag = RollingHistogram()    # seconds from due time to delivery
+        self.loop_duration = RollingHistogram()   # seconds spent handling one batch
+        self.guild_delivery: Dict[int, Dict[str, int]] = {}
+        self.shard_delivery: Dict[int, Dict[str, Any]] = {}
+        self.timers_fired = 0
+        self.task = None
         self.is_running = False
     
-    async def start(self):
-        """Start the scheduler background task"""
-        if not self.is_running:
-            self.is_running = True
-            asyncio.create_task(self.scheduler_loop())
-            print("Match scheduler started")
+    async def start(self, upcoming: Optional[List[Dict[Any, Any]]] = None):
+        """Start the scheduler background task (no-op while it is already running).
+        
+        `upcoming` is the upcoming matches index if the caller already read it
+        off the loop; otherwise it is loaded here.
+        """
+        # on_ready fires again on every reconnect; never spawn a second loop
+        if self.task is not None and not self.task.done():
+            return
+        self.is_running = True
+        self.load_pending_timers(upcoming)
+        self.task = asyncio.create_task(self.scheduler_loop())
+        print(f"Match scheduler started ({len(self.timer_keys)} pending timers)")
+    
+    def load_pending_timers(self, upcoming: Optional[List[Dict[Any, Any]]] = None):
+        """Rebuild reminder and lifecycle timers from the upcoming matches index after a restart"""
+        now = time.time()
+        timers = []
+        caught_up = skipped = 0
+        if upcoming is None:
+            upcoming = self.data.load_upcoming_matches()
+        
+        for match in upcoming:
+            for kind, due in self._match_timers(match, now):
+                timers.append((match['id'], kind, due))
+            
+            # Reminders that fell due while we were offline
+            if match.get('status') == 'scheduled' and not match.get('reminder_sent', False):
+                kickoff = self._kickoff(match)
+                if kickoff is None or kickoff - self.REMINDER_LEAD.total_seconds() > now:
+                    continue
+                if self.catchup_policy == 'send' and now - (kickoff - self.REMINDER_LEAD.total_seconds()) <= self.catchup_window:
+                    timers.append((match['id'], 'reminder', now))
+                    caught_up += 1
+                else:
+                    skipped += 1
+        
+        self.add_timers(timers)
+        if caught_up or skipped:
+            print(f"Reminder catch-up: {caught_up} sent late, {skipped} skipped as stale")
     
     async def scheduler_loop(self):
-        """Main scheduler loop that runs every minute"""
+        """Sleep until the next due timer, fire everything that is due, repeat"""
         while self.is_running:
             try:
-                await self.check_match_reminders()
-                await asyncio.sleep(60)  # Check every minute
+                self._wakeup.clear()
+                self._discard_tombstones()
+                
+                if not self.timers:
+                    # Nothing scheduled: park until a timer is added
+                    await self._wakeup.wait()
+                    continue
+                
+                delay = self.timers[0][0] - time.time()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, self.MAX_SLEEP))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                now = time.time()
+                due_timers = self._pop_due(now)
+                if any(kind == 'reminder' for _, _, kind in due_timers):
+                    # Deliberately early: reminders due within the window join this digest
+                    due_timers += self._pop_reminders_until(now + self.digest_window)
+                started = time.monotonic()
+                await self.fire_timers(due_timers)
+                self.loop_duration.observe(time.monotonic() - started)
+                self.timers_fired += len(due_timers)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 print(f"Scheduler error: {e}")
-                await asyncio.sleep(60)
+                await asyncio.sleep(1)
+    
+    def add_timer(self, match_id: int, kind: str, due: float):
+        """Add or re-key the timer for (match_id, kind); any previous entry becomes a tombstone"""
+        seq = next(self._seq)
+        self.timer_keys[(match_id, kind)] = seq
+        heapq.heappush(self.timers, (due, seq, match_id, kind))
+        if self.timers[0][1] == seq:
+            # New earliest deadline: wake the loop so it can shorten its sleep
+            self._wakeup.set()
+    
+    def add_timers(self, timers: List[Tuple[int, str, float]]):
+        """Add many (match_id, kind, due) timers with a single heapify and wakeup"""
+        if not timers:
+            return
+        for match_id, kind, due in timers:
+            seq = next(self._seq)
+            self.timer_keys[(match_id, kind)] = seq
+            self.timers.append((due, seq, match_id, kind))
+        heapq.heapify(self.timers)
+        self._wakeup.set()
+    
+    def cancel_timer(self, match_id: int, kind: str) -> bool:
+        """Lazily cancel a timer; the heap entry is dropped when it reaches the top"""
+        return self.timer_keys.pop((match_id, kind), None) is not None
+    
+    def _discard_tombstones(self):
+        while self.timers:
+            due, seq, match_id, kind = self.timers[0]
+            if self.timer_keys.get((match_id, kind)) == seq:
+                return
+            heapq.heappop(self.timers)
+    
+    def _pop_due(self, now: float) -> List[Tuple[float, int, str]]:
+        """Pop all live timers due at or before `now`"""
+        due_timers = []
+        while self.timers and self.timers[0][0] <= now:
+            due, seq, match_id, kind = heapq.heappop(self.timers)
+            if self.timer_keys.get((match_id, kind)) != seq:
+                continue
+            del self.timer_keys[(match_id, kind)]
+            due_timers.append((due, match_id, kind))
+        return due_timers
+    
+    def _pop_reminders_until(self, limit: float) -> List[Tuple[float, int, str]]:
+        """Pop reminders due before `limit` so they join the current digest.
+        
+        These reminders are sent before their due time, by at most
+        `limit - now`. Other timer kinds found on the way are pushed back untouched.
+        """
+        reminders, others = [], []
+        while self.timers and self.timers[0][0] <= limit:
+            entry = heapq.heappop(self.timers)
+            due, seq, match_id, kind = entry
+            if self.timer_keys.get((match_id, kind)) != seq:
+                continue
+            if kind == 'reminder':
+                del self.timer_keys[(match_id, kind)]
+                reminders.append((due, match_id, kind))
+            else:
+                others.append(entry)
+        for entry in others:
+            heapq.heappush(self.timers, entry)
+        return reminders
     
-    async def check_match_reminders(self):
-        """Check for matches that need reminders"""
+    async def fire_timers(self, due_timers: List[Tuple[float, int, str]]):
+        """Handle a batch of due timers with a single matches load and save"""
+        if not due_timers:
+            return
+        
         matches = self.data.load_matches()
-        current_time = datetime.now()
+        matches_by_id = {m['id']: m for m in matches}
+        changed = False
+        transitions = []  # (old_status, match) published once the save succeeds
         
-        for match in matches:
-            if match.get('status') != 'scheduled':
+        # Reminders go out in the background, before any status changes. Nothing
+        # below awaits, so no match save can land between this load and the save.
+        reminder_due = {
+            match_id: due for due, match_id, kind in due_timers
+            if kind == 'reminder' and match_id in matches_by_id
+            and matches_by_id[match_id].get('status') == 'scheduled'
+            and (not matches_by_id[match_id].get('reminder_sent', False) or match_id in self.reminder_progress)
+        }
+        if reminder_due:
+            reminder_matches = [matches_by_id[match_id] for match_id in sorted(reminder_due, key=reminder_due.get)]
+            # Reminders with nowhere to go count as sent right away
+            for match_id in self.dispatch_reminders(reminder_matches, reminder_due):
+                if not matches_by_id[match_id].get('reminder_sent', False):
+                    matches_by_id[match_id]['reminder_sent'] = True
+                    self.reminder_lag.observe(max(0.0, time.time() - reminder_due[match_id]))
+                    changed = True
+        
+        due_timers.sort(key=lambda t: (self.TIMER_KINDS.index(t[2]), t[0]))
+        for due, match_id, kind in due_timers:
+            match = matches_by_id.get(match_id)
+            if not match:
                 continue
             
-            try:
-                match_datetime = datetime.fromisoformat(match['datetime'])
-                time_diff = match_datetime - current_time
-                
-                # Send reminder 5 minutes before match
-                if (4 * 60 <= time_diff.total_seconds() <= 6 * 60 and 
-                    not match.get('reminder_sent', False)):
-                    await self.send_match_reminder(match)
-                    match['reminder_sent'] = True
-                    self.data.save_matches(matches)
+            if kind == 'kickoff':
+                if match.get('status') != 'scheduled':
+                    continue
+                match['status'] = 'live'
+                self.schedule_match(match)
+                self.reminder_progress.pop(match_id, None)
+                transitions.append(('scheduled', match))
+                changed = True
+                print(f"Match {match_id} is now live")
             
-            except Exception as e:
-                print(f"Error processing match {match.get('id', 'unknown')}: {e}")
+            elif kind == 'finish':
+                if match.get('status') != 'live':
+                    continue
+                match['status'] = 'finished'
+                transitions.append(('live', match))
+                changed = True
+                print(f"Match {match_id} has finished")
+        
+        if changed:
+            # Finished matches drop out of the upcoming index on this save
+            self.data.save_matches(matches)
+            for old_status, match in transitions:
+                self.data.publish('match.status_changed', old_status=old_status, **match_summary(match))
     
-    async def send_match_reminder(self, match: Dict[Any, Any]):
-        """Send match reminder notifications"""
-        try:
-            clubs = self.data.load_clubs()
-            club1 = next((c for c in clubs if c['id'] == match['club1_id']), None)
-            club2 = next((c for c in clubs if c['id'] == match['club2_id']), None)
-            
-            if not club1 or not club2:
-                return
-            
-            match_datetime = datetime.fromisoformat(match['datetime'])
-            
-            # Create reminder embed
-            embed = discord.Embed(
-                title="⚠️ Match Reminder",
-                description=f"**{club1['name']}** vs **{club2['name']}**",
-                color=0xff9900
+    def dispatch_reminders(self, matches: List[Dict[Any, Any]], reminder_due: Dict[int, float]) -> List[int]:
+        """Start sending `matches`' reminders to every guild that has not received them yet.
+        
+        Each shard's guilds are sent to by a task of their own, so a rate-limited
+        shard holds up neither the others nor the next batch of timers. Guilds
+        that cannot be reached now (unavailable, or on a disconnected shard) and
+        guilds whose send failed are retried until kickoff. Which guilds got a
+        reminder is only kept in memory: after a restart, a match already marked
+        reminder_sent is not retried. Returns the ids of matches with no guild
+        left to send to, for the caller to mark sent.
+        """
+        clubs = self.data.load_clubs()
+        club_names = {c['id']: c['name'] for c in clubs}
+        orphaned = [m['id'] for m in matches if m['club1_id'] not in club_names or m['club2_id'] not in club_names]
+        matches = [m for m in matches if m['id'] not in orphaned]
+        if not matches:
+            return orphaned
+        
+        targets, unreachable = self.get_reminder_targets()
+        missing = lambda guild_id: tuple(
+            m['id'] for m in matches if guild_id not in self.reminder_progress.get(m['id'], ())
+        )
+        unreachable = [guild_id for guild_id in unreachable if missing(guild_id)]
+        
+        # shard id -> the matches a guild still misses -> its (guild_id, channel) targets
+        batches: Dict[int, Dict[Tuple[int, ...], List[Tuple[int, Any]]]] = {}
+        for shard_id, shard_targets in targets.items():
+            for guild_id, channel in shard_targets:
+                pending = missing(guild_id)
+                if pending:
+                    batches.setdefault(shard_id, {}).setdefault(pending, []).append((guild_id, channel))
+        
+        if not batches and not unreachable:
+            return orphaned + [m['id'] for m in matches]
+        
+        matches_by_id = {m['id']: m for m in matches}
+        for shard_id, shard_batches in batches.items():
+            # Claim the guilds now so a retry firing mid-send does not send them twice
+            for pending, guild_targets in shard_batches.items():
+                for match_id in pending:
+                    self.reminder_progress.setdefault(match_id, set()).update(guild_id for guild_id, _ in guild_targets)
+            task = asyncio.create_task(self.deliver_to_shard(shard_id, shard_batches, matches_by_id, club_names, reminder_due))
+            self.delivery_tasks.add(task)
+            task.add_done_callback(self.delivery_tasks.discard)
+        
+        if unreachable:
+            print(f"{len(unreachable)} guild(s) unreachable for match reminder(s) {', '.join(str(m['id']) for m in matches)}")
+            self.retry_reminders(matches, time.time())
+        return orphaned
+    
+    def record_reminders(self, match_ids: List[int], reminder_due: Dict[int, float]):
+        """Mark reminders sent once they reached a guild; no await between the load and the save"""
+        matches = self.data.load_matches()
+        delivered_at = time.time()
+        changed = False
+        for match in matches:
+            if match['id'] in match_ids and match.get('status') == 'scheduled' and not match.get('reminder_sent', False):
+                match['reminder_sent'] = True
+                self.reminder_lag.observe(max(0.0, delivered_at - reminder_due.get(match['id'], delivered_at)))
+                changed = True
+        if changed:
+            self.data.save_matches(matches)
+    
+    def retry_reminders(self, matches: List[Dict[Any, Any]], now: float):
+        """Queue another attempt for undelivered reminders whose match has not kicked off yet"""
+        retry_at = now + self.REMINDER_RETRY_DELAY
+        retried = [m['id'] for m in matches if (self._kickoff(m) or 0) > retry_at]
+        for match_id in retried:
+            self.add_timer(match_id, 'reminder', retry_at)
+        if retried:
+            print(f"Reminder for match(es) {', '.join(map(str, retried))} not delivered everywhere; retrying in {self.REMINDER_RETRY_DELAY}s")
+        given_up = [m['id'] for m in matches if m['id'] not in retried]
+        if given_up:
+            print(f"Reminder for match(es) {', '.join(map(str, given_up))} not delivered everywhere before kickoff; giving up")
+    
+    def _reminder_embed(self, match: Dict[Any, Any], club_names: Dict[int, str]) -> discord.Embed:
+        club1_name = club_names[match['club1_id']]
+        club2_name = club_names[match['club2_id']]
+        match_datetime = datetime.fromisoformat(match['datetime'])
+        
+        # Create reminder embed
+        embed = discord.Embed(
+            title="⚠️ Match Reminder",
+            description=f"**{club1_name}** vs **{club2_name}**",
+            color=0xff9900
+        )
+        
+        timestamp = int(match_datetime.timestamp())
+        embed.add_field(name="⏰ Starting", value=f"<t:{timestamp}:R>", inline=True)
+        embed.add_field(name="📅 Time", value=f"<t:{timestamp}:t>", inline=True)
+        embed.add_field(name="🆔 Match ID", value=match['id'], inline=True)
+        
+        embed.add_field(name="🏆 Teams", value=f"{club1_name} vs {club2_name}", inline=False)
+        embed.set_footer(text="Good luck to both teams!")
+        return embed
+    
+    def _digest_embed(self, matches: List[Dict[Any, Any]], club_names: Dict[int, str]) -> discord.Embed:
+        matches = sorted(matches, key=lambda m: m['datetime'])
+        embed = discord.Embed(
+            title="⚠️ Matchday Reminder",
+            description=f"{len(matches)} matches are about to start!",
+            color=0xff9900
+        )
+        
+        # Embeds hold at most 25 fields
+        for match in matches[:25]:
+            timestamp = int(datetime.fromisoformat(match['datetime']).timestamp())
+            embed.add_field(
+                name=f"⚽ {club_names[match['club1_id']]} vs {club_names[match['club2_id']]}",
+                value=f"⏰ <t:{timestamp}:t> (<t:{timestamp}:R>)\n🆔 Match {match['id']}",
+                inline=True
             )
-            
-            embed.add_field(name="⏰ Starting In", value="5 minutes", inline=True)
-            timestamp = int(match_datetime.timestamp())
-            embed.add_field(name="📅 Time", value=f"<t:{timestamp}:t>", inline=True)
-            embed.add_field(name="🆔 Match ID", value=match['id'], inline=True)
-            
-            embed.add_field(name="🏆 Teams", value=f"{club1['name']} vs {club2['name']}", inline=False)
-            embed.set_footer(text="Good luck to both teams!")
-            
-            # Send to all channels where the bot has permission
-            # In a real implementation, you'd want to configure specific channels
-            for guild in self.bot.guilds:
-                try:
-                    # Find a channel to send the reminder
-                    for channel in guild.text_channels:
-                        if channel.permissions_for(guild.me).send_messages:
-                            await channel.send(embed=embed)
-                            break
-                except Exception as e:
-                    print(f"Error sending reminder to guild {guild.id}: {e}")
-            
-            print(f"Match reminder sent for match {match['id']}")
-            
-        except Exception as e:
-            print(f"Error sending match reminder: {e}")
+        
+        if len(matches) > 25:
+            embed.set_footer(text=f"...and {len(matches) - 25} more matches. Good luck to all teams!")
+        else:
+            embed.set_footer(text="Good luck to all teams!")
+        return embed
     
-    async def schedule_match_reminder(self, match: Dict[Any, Any]):
-        """Schedule a specific match reminder"""
-        try:
-            match_datetime = datetime.fromisoformat(match['datetime'])
-            reminder_time = match_datetime - timedelta(minutes=5)
-            current_time = datetime.now()
+    async def deliver_to_shard(self, shard_id: int, batches: Dict[Tuple[int, ...], List[Tuple[int, Any]]],
+                               matches_by_id: Dict[int, Dict[Any, Any]], club_names: Dict[int, str],
+                               reminder_due: Dict[int, float]) -> Dict[str, Any]:
+        """Send reminders to the guilds owned by one shard, within the shared send budget"""
+        started = time.monotonic()
+        summaries = []
+        for pending, targets in batches.items():
+            pending_matches = [matches_by_id[match_id] for match_id in pending]
+            try:
+                if len(pending_matches) == 1:
+                    embed = self._reminder_embed(pending_matches[0], club_names)
+                else:
+                    embed = self._digest_embed(pending_matches, club_names)
+                summary = await self.fanout.deliver(targets, embed=embed)
+            except Exception as e:
+                print(f"Error sending match reminder on shard {shard_id}: {e}")
+                summary = self._merge_summaries([], 0.0)
+                summary.update(targets=len(targets), failed=len(targets), guilds={guild_id: False for guild_id, _ in targets})
+            summaries.append(summary)
             
-            if reminder_time > current_time:
-                delay = (reminder_time - current_time).total_seconds()
-                
-                # Store the reminder task
-                task = asyncio.create_task(self._delayed_reminder(delay, match))
-                self.active_reminders[match['id']] = task
-                
-                print(f"Scheduled reminder for match {match['id']} in {delay} seconds")
+            failed = [guild_id for guild_id, ok in summary['guilds'].items() if not ok]
+            for match_id in pending:
+                if match_id in self.reminder_progress:
+                    self.reminder_progress[match_id].difference_update(failed)
+            if summary['sent']:
+                self.record_reminders(list(pending), reminder_due)
+            if failed:
+                self.retry_reminders(pending_matches, time.time())
         
-        except Exception as e:
-            print(f"Error scheduling match reminder: {e}")
+        summary = self._merge_summaries(summaries, time.monotonic() - started)
+        counts = self.shard_delivery.setdefault(shard_id, {'sent': 0, 'failed': 0, 'last_duration': 0.0})
+        counts['sent'] += summary['sent']
+        counts['failed'] += summary['failed']
+        counts['last_duration'] = summary['duration']
+        for guild_id, ok in summary['guilds'].items():
+            guild_counts = self.guild_delivery.setdefault(guild_id, {'sent': 0, 'failed': 0})
+            guild_counts['sent' if ok else 'failed'] += 1
+        
+        match_ids = ", ".join(str(match_id) for match_id in sorted({i for pending in batches for i in pending}))
+        print(f"Match reminder sent for match(es) {match_ids} on shard {shard_id}: "
+              f"{summary['sent']}/{summary['targets']} guilds in {summary['duration']:.2f}s "
+              f"({summary['failed']} failed, {summary['retries']} retries)")
+        for guild_id, error in summary['failures'].items():
+            print(f"Error sending reminder to guild {guild_id}: {error}")
+        return summary
+    
+    @staticmethod
+    def _merge_summaries(summaries: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+        merged = {'targets': 0, 'sent': 0, 'failed': 0, 'retries': 0, 'duration': duration, 'failures': {}, 'guilds': {}}
+        for summary in summaries:
+            for key in ('targets', 'sent', 'failed', 'retries'):
+                merged[key] += summary[key]
+            merged['failures'].update(summary['failures'])
+            merged['guilds'].update(summary['guilds'])
+        return merged
     
-    async def _delayed_reminder(self, delay: float, match: Dict[Any, Any]):
-        """Execute a delayed reminder"""
+    def get_reminder_targets(self) -> Tuple[Dict[int, List[Tuple[int, Any]]], List[int]]:
+        """Pick the announcement channel of every guild to receive reminders, grouped by owning shard.
+        
+        Also returns the ids of guilds that cannot be reached right now.
+        """
+        targets: Dict[int, List[Tuple[int, Any]]] = {}
+        unreachable = []
+        for guild in self.bot.guilds:
+            if guild.unavailable or not shard_connected(self.bot, guild.shard_id):
+                unreachable.append(guild.id)
+                continue
+            channel = self.guild_settings.get_announcement_channel(guild)
+            if channel:
+                targets.setdefault(guild.shard_id, []).append((guild.id, channel))
+        return targets, unreachable
+    
+    @staticmethod
+    def _kickoff(match: Dict[Any, Any]) -> Optional[float]:
         try:
-            await asyncio.sleep(delay)
-            await self.send_match_reminder(match)
-            
-            # Update match data to mark reminder as sent
-            matches = self.data.load_matches()
-            for m in matches:
-                if m['id'] == match['id']:
-                    m['reminder_sent'] = True
-                    break
-            self.data.save_matches(matches)
-            
-            # Remove from active reminders
-            if match['id'] in self.active_reminders:
-                del self.active_reminders[match['id']]
-        
-        except asyncio.CancelledError:
-            print(f"Reminder cancelled for match {match['id']}")
-        except Exception as e:
-            print(f"Error in delayed reminder: {e}")
-    
-    def cancel_match_reminder(self, match_id: int):
-        """Cancel a scheduled match reminder"""
-        if match_id in self.active_reminders:
-            self.active_reminders[match_id].cancel()
-            del self.active_reminders[match_id]
-            print(f"Cancelled reminder for match {match_id}")
+            return datetime.fromisoformat(match['datetime']).timestamp()
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Invalid datetime for match {match.get('id', 'unknown')}: {e}")
+            return None
+    
+    def _match_timers(self, match: Dict[Any, Any], now: float) -> List[Tuple[str, float]]:
+        """The (kind, due) timers a match needs in its current status"""
+        kickoff = self._kickoff(match)
+        if kickoff is None:
+            return []
+        
+        timers = []
+        if match.get('status') == 'scheduled':
+            reminder_due = kickoff - self.REMINDER_LEAD.total_seconds()
+            if not match.get('reminder_sent', False) and reminder_due > now:
+                timers.append(('reminder', reminder_due))
+            # A kickoff already in the past fires on the next loop pass
+            timers.append(('kickoff', kickoff))
+        elif match.get('status') == 'live':
+            timers.append(('finish', kickoff + MATCH_DURATION.total_seconds()))
+        return timers
+    
+    def schedule_match(self, match: Dict[Any, Any]):
+        """Schedule (or re-key) every timer for a match; timers it no longer needs are cancelled"""
+        wanted = dict(self._match_timers(match, time.time()))
+        for kind in self.TIMER_KINDS:
+            if kind in wanted:
+                self.add_timer(match['id'], kind, wanted[kind])
+            else:
+                self.cancel_timer(match['id'], kind)
+    
+    def schedule_matches(self, matches: List[Dict[Any, Any]]) -> int:
+        """Schedule timers for many new matches in one batch; returns how many were added"""
+        now = time.time()
+        timers = [
+            (match['id'], kind, due)
+            for match in matches
+            for kind, due in self._match_timers(match, now)
+        ]
+        self.add_timers(timers)
+        print(f"Scheduled {len(timers)} timers for {len(matches)} matches")
+        return len(timers)
+    
+    def cancel_match(self, match_id: int):
+        """Cancel every pending timer for a match"""
+        cancelled = [kind for kind in self.TIMER_KINDS if self.cancel_timer(match_id, kind)]
+        self.reminder_progress.pop(match_id, None)
+        if cancelled:
+            print(f"Cancelled {', '.join(cancelled)} timers for match {match_id}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of scheduler timing and delivery metrics"""
+        next_due = self.timers[0][0] - time.time() if self.timers else None
+        return {
+            'running': self.is_running,
+            'pending_timers': len(self.timer_keys),
+            'heap_size': len(self.timers),  # includes tombstones not yet discarded
+            'next_due_in': next_due,
+            'timers_fired': self.timers_fired,
+            'reminder_deliveries_in_flight': len(self.delivery_tasks),
+            'reminder_lag': self.reminder_lag.snapshot(),
+            'loop_duration': self.loop_duration.snapshot(),
+            'delivery': {
+                'sent': sum(c['sent'] for c in self.guild_delivery.values()),
+                'failed': sum(c['failed'] for c in self.guild_delivery.values()),
+                'guilds': {str(guild_id): counts for guild_id, counts in self.guild_delivery.items()},
+                'shards': {str(shard_id): counts for shard_id, counts in self.shard_delivery.items()}
+            }
+        }
     
     async def stop(self):
         """Stop the scheduler"""
         self.is_running = False
         
-        # Cancel all active reminders
-        for task in self.active_reminders.values():
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        for task in list(self.delivery_tasks):
             task.cancel()
-        self.active_reminders.clear()
+        
+        self.timers.clear()
+        self.timer_keys.clear()
+        self.reminder_progress.clear()
         
         print("Match scheduler stopped")
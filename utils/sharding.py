@@ -0,0 +1,63 @@
+import os
+from discord.ext import commands
+from typing import Any, Dict, List
+
+def sharding_options() -> Dict[str, Any]:
+    """Client class and shard keyword arguments selected by the environment.
+    
+    SHARDING=auto runs an AutoShardedBot with one gateway connection per
+    shard. SHARD_COUNT fixes the total number of shards (Discord's
+    recommendation is used otherwise) and SHARD_IDS, a comma-separated list
+    that requires SHARD_COUNT, limits this process to some of them.
+    
+    Running several processes against the same data directory is not
+    supported: each one runs its own match scheduler and rewrites the same
+    JSON files, and the data lock only covers threads within one process.
+    Raises ValueError for malformed settings.
+    """
+    if os.getenv('SHARDING', 'off').lower() not in ('auto', 'on', '1', 'true'):
+        return {'cls': commands.Bot, 'kwargs': {}}
+    
+    kwargs: Dict[str, Any] = {}
+    if os.getenv('SHARD_COUNT'):
+        try:
+            kwargs['shard_count'] = int(os.getenv('SHARD_COUNT'))
+        except ValueError:
+            raise ValueError(f"SHARD_COUNT must be an integer, got {os.getenv('SHARD_COUNT')!r}") from None
+        if kwargs['shard_count'] < 1:
+            raise ValueError("SHARD_COUNT must be at least 1")
+    if os.getenv('SHARD_IDS'):
+        if 'shard_count' not in kwargs:
+            raise ValueError("SHARD_IDS requires SHARD_COUNT to be set")
+        try:
+            shard_ids = [int(shard_id) for shard_id in os.getenv('SHARD_IDS').split(',') if shard_id.strip()]
+        except ValueError:
+            raise ValueError(f"SHARD_IDS must be comma-separated integers, got {os.getenv('SHARD_IDS')!r}") from None
+        invalid = [shard_id for shard_id in shard_ids if not 0 <= shard_id < kwargs['shard_count']]
+        if invalid:
+            raise ValueError(f"SHARD_IDS {invalid} are outside 0..{kwargs['shard_count'] - 1}")
+        kwargs['shard_ids'] = shard_ids
+    return {'cls': commands.AutoShardedBot, 'kwargs': kwargs}
+
+
+def shard_connected(bot, shard_id: int) -> bool:
+    """Whether the gateway connection serving `shard_id` is up"""
+    if isinstance(bot, commands.AutoShardedBot):
+        shard = bot.get_shard(shard_id)
+        return shard is not None and not shard.is_closed()
+    return not bot.is_closed()
+
+
+def shard_summary(bot) -> List[Dict[str, Any]]:
+    """Latency and guild count of each shard run by this process"""
+    guilds: Dict[int, int] = {}
+    for guild in bot.guilds:
+        guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+    
+    if not isinstance(bot, commands.AutoShardedBot):
+        return [{'shard_id': bot.shard_id or 0, 'latency': bot.latency, 'guilds': len(bot.guilds), 'closed': bot.is_closed()}]
+    
+    return [
+        {'shard_id': shard_id, 'latency': shard.latency, 'guilds': guilds.get(shard_id, 0), 'closed': shard.is_closed()}
+        for shard_id, shard in sorted(bot.shards.items())
+    ]
@@ -0,0 +1,61 @@
+import contextlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+class StartupProfiler:
+    """Wall-clock timings for each step of process startup.
+    
+    Phases are recorded with `phase(name)` around imports and subsystem
+    construction; milestones mark points on the way to serving traffic
+    (login, gateway ready, first handled interaction), measured from the
+    moment this module was first imported.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.milestones: Dict[str, float] = {}
+        self.verbose = False
+    
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+    
+    def milestone(self, name: str) -> bool:
+        """Record the first time `name` is reached; returns False if it already was"""
+        if name in self.milestones:
+            return False
+        self.milestones[name] = time.perf_counter() - self.started
+        if self.verbose:
+            print(f"[startup] {name} at {self.milestones[name]:.3f}s")
+        return True
+    
+    def elapsed(self, milestone: str) -> Optional[float]:
+        return self.milestones.get(milestone)
+    
+    def report(self) -> str:
+        """Human-readable breakdown, slowest phase first"""
+        lines = ["Startup profile:"]
+        total = sum(seconds for _, seconds in self.phases)
+        width = max([len(name) for name, _ in self.phases] + [len('phases total')])
+        for name, seconds in sorted(self.phases, key=lambda item: item[1], reverse=True):
+            share = seconds / total * 100 if total else 0
+            lines.append(f"  {name:<{width}}  {seconds * 1000:8.1f} ms  {share:5.1f}%")
+        lines.append(f"  {'phases total':<{width}}  {total * 1000:8.1f} ms")
+        for name, at in sorted(self.milestones.items(), key=lambda item: item[1]):
+            lines.append(f"  {name} at {at:.3f}s")
+        return "\n".join(lines)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Timings for /health"""
+        return {
+            'phases': {name: seconds for name, seconds in self.phases},
+            'milestones': dict(self.milestones)
+        }
+
+
+startup = StartupProfiler()
@@ -0,0 +1,243 @@
+import asyncio
+import contextvars
+import threading
+import time
+from typing import List, Dict, Any, Iterable, Optional
+
+DAY = 86400
+WEEK = 7 * DAY
+
+class ValueHistory:
+    """Append-only market value time series for players, clubs and the league.
+
+    New points are appended to a newline-delimited log, so recording a value
+    change never reads or rewrites the stored series. The log is folded into
+    the series on the command worker pool once FOLD_AFTER points have piled up,
+    before a summary is read, and at startup. Folded points are stored raw for
+    a short window and then merged into daily and weekly buckets so the file
+    stays bounded no matter how often values change. A small summary per
+    series is kept in a separate file so history lookups never have to read
+    the full series.
+    """
+
+    HISTORY_FILE = 'value_history.json'
+    SUMMARY_FILE = 'value_history_summary.json'
+    LOG_FILE = 'value_history.log'
+
+    RAW_RETENTION = 2 * DAY      # raw points younger than this are kept as-is
+    DAILY_RETENTION = 90 * DAY   # daily buckets younger than this are kept
+    MAX_WEEKLY_BUCKETS = 520     # ~10 years of weekly buckets
+    RECENT_POINTS = 5
+    FOLD_AFTER = 200             # logged points that trigger a background fold
+
+    def __init__(self, data_manager, runner=None):
+        self.data = data_manager
+        self.runner = runner
+        self.pending_points = 0
+        self.folding: Optional[asyncio.Task] = None
+        # Held while the history files are rewritten; never held across an await
+        self.fold_lock = threading.Lock()
+
+    @staticmethod
+    def player_key(player_id: int) -> str:
+        return f"player:{player_id}"
+
+    @staticmethod
+    def club_key(club_id: int) -> str:
+        return f"club:{club_id}"
+
+    LEAGUE_KEY = 'league'
+
+    def record_snapshot(self, players: List[Dict[Any, Any]], player_ids: Iterable[int] = (),
+                        club_ids: Iterable[Optional[int]] = (), timestamp: Optional[float] = None):
+        """Append the current values of the given players, their clubs and the league.
+
+        `players` is the full, already updated players list; club and league
+        totals are derived from it so aggregates always match the roster.
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        player_ids = set(player_ids)
+        club_ids = {cid for cid in club_ids if cid}
+
+        points = {}
+        for player in players:
+            if player['id'] in player_ids:
+                points[self.player_key(player['id'])] = player.get('value', 0)
+                if player.get('club_id'):
+                    club_ids.add(player['club_id'])
+
+        club_totals = {cid: 0 for cid in club_ids}
+        league_total = 0
+        for player in players:
+            value = player.get('value', 0)
+            league_total += value
+            if player.get('club_id') in club_totals:
+                club_totals[player['club_id']] += value
+
+        for club_id, total in club_totals.items():
+            points[self.club_key(club_id)] = total
+        points[self.LEAGUE_KEY] = league_total
+
+        self.append_points(points, timestamp)
+
+    def append_points(self, points: Dict[str, int], timestamp: float):
+        """Append one point to each named series; they reach the stored series on the next fold"""
+        self.data.append_records(self.LOG_FILE, [
+            {'key': key, 'at': timestamp, 'value': value} for key, value in points.items()
+        ])
+        self.pending_points += len(points)
+        if self.pending_points >= self.FOLD_AFTER:
+            self.fold_soon()
+
+    def fold_soon(self):
+        """Fold the log on the command worker pool unless a fold is already running"""
+        if self.runner is None:
+            self.fold()
+            return
+        if self.folding is not None and not self.folding.done():
+            return
+        self.pending_points = 0
+        # A fresh context keeps the fold out of the timings of the command that triggered it
+        self.folding = asyncio.get_running_loop().create_task(
+            self.runner.run_blocking(self.fold), context=contextvars.Context()
+        )
+        self.folding.add_done_callback(self._fold_done)
+
+    @staticmethod
+    def _fold_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error folding value history: {task.exception()}")
+
+    def fold(self) -> int:
+        """Move logged points into the stored series and summaries; call off the event loop.
+
+        Returns how many points were folded.
+        """
+        with self.fold_lock:
+            records = self.data.claim_records(self.LOG_FILE)
+            if not records:
+                return 0
+            history, summaries = self._load()
+            folded = self._apply(records, history, summaries)
+            self._save(history, summaries)
+            return folded
+
+    def get_summary(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the summary for a series, folding logged points first; call off the event loop"""
+        self.fold()
+        return self.data.load_object(self.SUMMARY_FILE).get(key)
+
+    def remove_series(self, keys: Iterable[str]):
+        """Drop series for deleted players or clubs; call off the event loop"""
+        keys = list(keys)
+        with self.fold_lock:
+            # Fold first so logged points cannot bring a removed series back
+            records = self.data.claim_records(self.LOG_FILE)
+            history, summaries = self._load()
+            self._apply(records, history, summaries)
+            for key in keys:
+                history.pop(key, None)
+                summaries.pop(key, None)
+            self._save(history, summaries)
+
+    def clear(self):
+        """Drop every series, after all data was reset"""
+        with self.fold_lock:
+            self.data.claim_records(self.LOG_FILE)
+            self._save({}, {})
+
+    def _load(self):
+        return self.data.load_object(self.HISTORY_FILE), self.data.load_object(self.SUMMARY_FILE)
+
+    def _save(self, history: Dict[str, Any], summaries: Dict[str, Any]):
+        self.data.save_object(self.HISTORY_FILE, history)
+        self.data.save_object(self.SUMMARY_FILE, summaries)
+        # The claimed points are stored now
+        self.data.release_records(self.LOG_FILE)
+
+    def _apply(self, records: List[Dict[str, Any]], history: Dict[str, Any], summaries: Dict[str, Any]) -> int:
+        """Add logged points to their series in order, skipping points folded before an interrupted release"""
+        folded = 0
+        for record in records:
+            key, timestamp, value = record['key'], record['at'], record['value']
+            previous = summaries.get(key)
+            if previous is not None and timestamp <= previous['updated_at']:
+                continue
+            series = history.setdefault(key, {'raw': [], 'daily': [], 'weekly': []})
+            series['raw'].append([timestamp, value])
+            self._downsample(series, timestamp)
+            summaries[key] = self._summarize(series, previous, value, timestamp)
+            folded += 1
+        return folded
+
+    def _downsample(self, series: Dict[str, List[List[float]]], now: float):
+        """Fold old raw points into daily buckets and old daily buckets into weekly ones"""
+        raw_cutoff = now - self.RAW_RETENTION
+        while series['raw'] and series['raw'][0][0] < raw_cutoff:
+            ts, value = series['raw'].pop(0)
+            self._add_to_bucket(series['daily'], ts - ts % DAY, value)
+
+        daily_cutoff = now - self.DAILY_RETENTION
+        while series['daily'] and series['daily'][0][0] < daily_cutoff:
+            start, close, low, high = series['daily'].pop(0)
+            self._add_to_bucket(series['weekly'], start - start % WEEK, close, low, high)
+
+        if len(series['weekly']) > self.MAX_WEEKLY_BUCKETS:
+            del series['weekly'][:-self.MAX_WEEKLY_BUCKETS]
+
+    @staticmethod
+    def _add_to_bucket(buckets: List[List[float]], start: float, close: float,
+                       low: Optional[float] = None, high: Optional[float] = None):
+        """Merge a value into the bucket starting at `start` ([start, close, low, high])"""
+        low = close if low is None else low
+        high = close if high is None else high
+        if buckets and buckets[-1][0] == start:
+            bucket = buckets[-1]
+            bucket[1] = close
+            bucket[2] = min(bucket[2], low)
+            bucket[3] = max(bucket[3], high)
+        else:
+            buckets.append([start, close, low, high])
+
+    def _summarize(self, series: Dict[str, List[List[float]]], previous: Optional[Dict[str, Any]],
+                   value: int, timestamp: float) -> Dict[str, Any]:
+        """Build the summary incrementally from the previous summary and the new point"""
+        if previous is None:
+            previous = {'first': value, 'first_at': timestamp, 'current': value,
+                        'min': value, 'max': value, 'points': 0, 'changes': 0}
+
+        timeline = self._timeline(series)
+        recent = [[ts, v] for ts, v in timeline[-self.RECENT_POINTS:]]
+
+        return {
+            'current': value,
+            'updated_at': timestamp,
+            'first': previous['first'],
+            'first_at': previous['first_at'],
+            'min': min(previous['min'], value),
+            'max': max(previous['max'], value),
+            'points': previous['points'] + 1,
+            # Snapshots are also taken when a value stays the same (transfers, releases)
+            'changes': previous.get('changes', 0) + (value != previous['current']),
+            'change_7d': value - self._value_at(timeline, timestamp - 7 * DAY, previous['first']),
+            'change_30d': value - self._value_at(timeline, timestamp - 30 * DAY, previous['first']),
+            'recent': recent
+        }
+
+    @staticmethod
+    def _timeline(series: Dict[str, List[List[float]]]) -> List[List[float]]:
+        """Chronological (timestamp, value) pairs across weekly, daily and raw storage"""
+        timeline = [[b[0], b[1]] for b in series['weekly']]
+        timeline.extend([b[0], b[1]] for b in series['daily'])
+        timeline.extend(series['raw'])
+        return timeline
+
+    @staticmethod
+    def _value_at(timeline: List[List[float]], timestamp: float, default: int) -> int:
+        """Value in effect at `timestamp` (the last point at or before it)"""
+        result = default
+        for ts, value in timeline:
+            if ts > timestamp:
+                break
+            result = value
+        return result
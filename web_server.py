@@ -1,43 +1,163 @@
-from flask import Flask, render_template
-import threading
+import asyncio
+import json
 import os
+from string import Template
+from aiohttp import web
+from utils.league_api import LeagueAPI
+from utils.exports import DataExporter
+from utils.metrics import registry
+from utils.http_cache import ResponseCache
+from utils.startup import startup
 
-app = Flask(__name__)
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
 
-@app.route('/')
-def home():
-    """Main page showing bot status"""
-    return render_template('index.html')
-
-@app.route('/status')
-def status():
-    """API endpoint for bot status"""
-    return {
-        'status': 'online',
-        'message': 'Discord Football Bot is running!',
-        'features': [
-            'Club Management',
-            'Player Management', 
-            'Transfer System',
-            'Match Scheduling',
-            'Statistics & Analytics',
-            'Administrative Controls'
-        ]
-    }
-
-@app.route('/health')
-def health():
-    """Health check endpoint"""
-    return {'status': 'healthy', 'service': 'discord-football-bot'}
-
-def run_server():
-    """Run the Flask web server"""
-    port = int(os.getenv('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
-
-def start_web_server():
-    """Start the web server in a separate thread"""
-    server_thread = threading.Thread(target=run_server, daemon=True)
-    server_thread.start()
-    print(f"Web server started on port {os.getenv('PORT', 5000)}")
-    return server_thread
+class WebServer:
+    """Keep-alive and status web server running inside the bot's event loop.
+    
+    Routes read bot and data-layer state directly from the DiscordBot instance,
+    so there is no extra thread and no cross-thread file access.
+    """
+    
+    def __init__(self, discord_bot, port: int = None):
+        self.discord_bot = discord_bot
+        self.port = port or int(os.getenv('PORT', 5000))
+        self.keepalive_interval = float(os.getenv('EVENT_KEEPALIVE', 15))
+        self.max_subscribers = int(os.getenv('EVENT_MAX_SUBSCRIBERS', 500))
+        self.app = web.Application()
+        self.runner = None
+        self._index_template = None
+        self.cache = ResponseCache()
+        self.api = LeagueAPI(discord_bot.data_manager)
+        self.exporter = DataExporter(self.api)
+        self.setup_routes()
+    
+    def setup_routes(self):
+        """Register HTTP routes"""
+        self.app.router.add_get('/', self.home)
+        self.app.router.add_get('/status', self.status)
+        self.app.router.add_get('/health', self.health)
+        self.app.router.add_get('/scheduler', self.scheduler_stats)
+        self.app.router.add_get('/api/summary', self.summary)
+        self.app.router.add_get('/metrics', self.metrics)
+        self.app.router.add_get('/events', self.events)
+        self.api.register(self.app)
+        self.exporter.register(self.app)
+    
+    async def start(self):
+        """Bind the server on the running event loop"""
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '0.0.0.0', self.port)
+        await site.start()
+        print(f"Web server started on port {self.port}")
+    
+    async def stop(self):
+        """Close the listening socket and open connections"""
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+    
+    async def home(self, request):
+        """Main page showing bot status and league numbers"""
+        entry = self.cache.get('index', self.api.summary_version(), self.render_index)
+        return self.cache.respond(request, entry)
+    
+    def render_index(self):
+        if self._index_template is None:
+            with open(os.path.join(TEMPLATE_DIR, 'index.html'), 'r', encoding='utf-8') as f:
+                self._index_template = Template(f.read())
+        summary = self.api.league_summary()
+        html = self._index_template.safe_substitute(
+            clubs=f"{summary['clubs']:,}",
+            players=f"{summary['players']:,}",
+            upcoming_matches=f"{summary['upcoming_matches']:,}",
+            transfers=f"{summary['transfers']:,}",
+            total_player_value=f"€{summary['total_player_value']:,}"
+        )
+        return html.encode('utf-8'), 'text/html'
+    
+    async def summary(self, request):
+        """League summary numbers as JSON"""
+        entry = self.cache.get('summary', self.api.summary_version(),
+                               lambda: (json.dumps(self.api.league_summary()).encode('utf-8'), 'application/json'))
+        return self.cache.respond(request, entry)
+    
+    async def status(self, request):
+        """API endpoint for bot status"""
+        bot = self.discord_bot.bot
+        ready = bot.is_ready()
+        return web.json_response({
+            'status': 'online' if ready else 'starting',
+            'message': 'Discord Football Bot is running!',
+            'guilds': len(bot.guilds) if ready else 0,
+            'latency_ms': round(bot.latency * 1000, 1) if ready else None,
+            'features': [
+                'Club Management',
+                'Player Management',
+                'Transfer System',
+                'Match Scheduling',
+                'Statistics & Analytics',
+                'Administrative Controls'
+            ]
+        })
+    
+    async def health(self, request):
+        """Health check endpoint"""
+        return web.json_response({
+            'status': 'healthy',
+            'service': 'discord-football-bot',
+            'discord_ready': self.discord_bot.bot.is_ready(),
+            'event_loop': self.discord_bot.loop_monitor.stats(),
+            'startup': startup.stats()
+        })
+    
+    async def scheduler_stats(self, request):
+        """Scheduler lag, queue depth and delivery metrics"""
+        return web.json_response(self.discord_bot.scheduler.stats())
+    
+    async def metrics(self, request):
+        """Prometheus text-format metrics for the bot process"""
+        return web.Response(
+            body=registry.render().encode('utf-8'),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
+    
+    async def events(self, request):
+        """Server-sent events stream of transfers, value changes and match updates.
+        
+        `?types=transfer.completed,match.status_changed` limits the stream to
+        those event types.
+        """
+        bus = self.discord_bot.data_manager.events
+        if len(bus.subscribers) >= self.max_subscribers:
+            return web.json_response({'error': 'too many subscribers'}, status=503)
+        
+        types = [t for t in request.query.get('types', '').split(',') if t]
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        await response.prepare(request)
+        
+        subscription = bus.subscribe(types, request.headers.get('Last-Event-ID'))
+        reported_drops = 0
+        try:
+            if subscription.resync:
+                # The client's last event is older than what we can replay
+                await response.write(b'event: resync\ndata: {"reason": "history_expired"}\n\n')
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), timeout=self.keepalive_interval)
+                except asyncio.TimeoutError:
+                    frame = b': keep-alive\n\n'
+                if subscription.dropped > reported_drops:
+                    # Tell the client it missed events so it can refetch from the API
+                    await response.write(f"event: resync\ndata: {{\"dropped\": {subscription.dropped - reported_drops}}}\n\n".encode('utf-8'))
+                    reported_drops = subscription.dropped
+                await response.write(frame)
+        except ConnectionResetError:
+            pass
+        finally:
+            bus.unsubscribe(subscription)
+        return response